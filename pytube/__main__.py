@@ -8,9 +8,17 @@ smaller peripheral modules and functions.
 
 """
 
-import json
+import asyncio
 import logging
-from typing import Optional, Dict, List
+from typing import (
+    AsyncGenerator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import parse_qsl
 from html import unescape
 
@@ -20,12 +28,14 @@ from pytube import extract
 from pytube import request
 from pytube import Stream
 from pytube import StreamQuery
+from pytube.cache import player_cache
+from pytube.cipher import Cipher
 from pytube.extract import (
     apply_descrambler,
     apply_signature,
     get_ytplayer_config,
 )
-from pytube.exceptions import VideoUnavailable
+from pytube.exceptions import PytubeError, VideoUnavailable
 from pytube.monostate import OnProgress, OnComplete, Monostate
 
 logger = logging.getLogger(__name__)
@@ -58,6 +68,8 @@ class YouTube:
         self.vid_info: Optional[Dict] = None  # parsed content of vid_info_raw
 
         self.watch_html: Optional[str] = None  # the html of /watch?v=<video_id>
+        # whether the watch html is only read up to the player configuration
+        self.partial_watch_html = False
         self.embed_html: Optional[str] = None
         self.player_config_args: Dict = {}  # inline js in the html containing
         self.player_response: Dict = {}
@@ -65,6 +77,11 @@ class YouTube:
         self.age_restricted: Optional[bool] = None
 
         self.fmt_streams: List[Stream] = []
+        # whether ``fmt_streams`` has been built, see :meth:`load_streams`
+        self.streams_loaded = False
+        self._streams_lock: Optional[asyncio.Lock] = None
+        # query over ``fmt_streams``, keeps its indexes between calls
+        self._stream_query: Optional[StreamQuery] = None
 
         # video_id part of /watch?v=<video_id>
         self.video_id = extract.video_id(url)
@@ -74,7 +91,9 @@ class YouTube:
 
         # Shared between all instances of `Stream` (Borg pattern).
         self.stream_monostate = Monostate(
-            on_progress=on_progress_callback, on_complete=on_complete_callback
+            on_progress=on_progress_callback,
+            on_complete=on_complete_callback,
+            video_id=self.video_id,
         )
 
     @classmethod
@@ -84,6 +103,8 @@ class YouTube:
         defer_prefetch_init: bool = False,
         on_progress_callback: Optional[OnProgress] = None,
         on_complete_callback: Optional[OnComplete] = None,
+        partial_watch_html: bool = False,
+        lazy: bool = False,
     ):
         """Create a new YouTube class object.
 
@@ -97,14 +118,91 @@ class YouTube:
         :param func on_complete_callback:
             (Optional) User defined callback function for stream download
             complete events.
+        :param bool partial_watch_html:
+            Stop downloading the watch html after the player configuration,
+            which saves bandwidth and memory. The description is then only
+            available from the ``player_response``.
+        :param bool lazy:
+            Only extract the metadata (e.g.: title, length, thumbnail_url).
+            base.js isn't fetched and no signature is deciphered until the
+            streams are loaded by :meth:`load_streams`.
 
         """
         self = cls(url, on_progress_callback, on_complete_callback)
+        self.partial_watch_html = partial_watch_html
         if not defer_prefetch_init:
-            await self.prefetch()
-            await self.descramble()
+            await self.prefetch(fetch_js=not lazy)
+            if lazy:
+                self.parse_metadata()
+            else:
+                await self.descramble()
         return self
 
+    @classmethod
+    async def create_many(
+        cls,
+        urls: Iterable[str],
+        concurrency: int = 10,
+        **kwargs,
+    ) -> AsyncGenerator[Tuple[str, Union["YouTube", Exception]], None]:
+        """Create YouTube class objects for many urls concurrently.
+
+        At most ``concurrency`` objects are created at the same time, all of
+        them sharing the pooled session and the cached player javascript.
+        Results are yielded as soon as they are finished, so the order differs
+        from ``urls``. A failing url doesn't stop the batch, its exception
+        (e.g.: :class:`VideoUnavailable <VideoUnavailable>`,
+        :class:`RegexMatchError <RegexMatchError>` or
+        :class:`LiveStreamError <LiveStreamError>`) is yielded instead of the
+        object.
+
+        **Example**:
+
+        >>> async for url, yt in YouTube.create_many(urls, concurrency=20):
+        ...     if isinstance(yt, Exception):
+        ...         continue
+
+        :param urls:
+            Valid YouTube watch URLs, consumed lazily.
+        :param int concurrency:
+            Maximum number of objects created at the same time.
+        :param kwargs:
+            Keyword arguments passed on to :meth:`create`, e.g.:
+            ``on_progress_callback``.
+        :rtype: AsyncGenerator
+        :returns:
+            Tuples of the url and its object or exception.
+        """
+        url_iterator = iter(urls)
+        # bounded, so workers pause while the consumer lags behind
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        async def worker() -> None:
+            for url in url_iterator:
+                try:
+                    result: Union[YouTube, Exception] = await cls.create(
+                        url, **kwargs
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.debug("creating %s failed: %s", url, e)
+                    result = e
+                await results.put((url, result))
+            await results.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
     async def descramble(self) -> None:
         """Descramble the stream data and build Stream instances.
 
@@ -117,7 +215,18 @@ class YouTube:
 
         """
         logger.info("init started")
+        self.parse_metadata()
+        await self.load_streams()
+        logger.info("init finished successfully")
 
+    def parse_metadata(self) -> None:
+        """Extract the player configuration and the ``player_response``.
+
+        This is all the metadata properties need, the stream manifests are
+        left untouched until :meth:`load_streams`.
+
+        :rtype: None
+        """
         self.vid_info = dict(parse_qsl(self.vid_info_raw))
         if self.age_restricted:
             self.player_config_args = self.vid_info
@@ -145,80 +254,145 @@ class YouTube:
                     1,
                 )
 
-        # https://github.com/nficano/pytube/issues/165
-        stream_maps = ["url_encoded_fmt_stream_map"]
-        if "adaptive_fmts" in self.player_config_args:
-            stream_maps.append("adaptive_fmts")
+        # load the player_response object (contains subtitle information),
+        # parsed once and shared with the descrambler and the signature.
+        self.player_response = extract.get_player_response(
+            self.player_config_args
+        )
+        self.stream_monostate.title = self.title
+        self.stream_monostate.duration = self.length
+        self.stream_monostate.player_config_args = self.player_config_args
 
-        # unscramble the progressive and adaptive stream manifests.
-        for fmt in stream_maps:
-            if not self.age_restricted and fmt in self.vid_info:
-                apply_descrambler(self.vid_info, fmt)
-            apply_descrambler(self.player_config_args, fmt)
+    async def load_streams(self) -> StreamQuery:
+        """Descramble the stream manifests and build the streams, once.
 
-            if not self.js:
+        Fetches base.js if needed and deciphers the signatures. Concurrent
+        calls wait for the first one, later calls return right away.
+
+        :rtype: :class:`StreamQuery <StreamQuery>`
+        """
+        if self._streams_lock is None:
+            self._streams_lock = asyncio.Lock()
+        async with self._streams_lock:
+            if not self.streams_loaded:
+                await self._build_streams()
+                self.streams_loaded = True
+        return self.streams
+
+    async def _build_streams(self) -> None:
+        # fetch base.js before touching the manifests, so a failed fetch
+        # leaves them as they were and load_streams() can be retried.
+        if not self.js:
+            if not self.js_url:
                 if not self.embed_html:
                     self.embed_html = await request.get(url=self.embed_url)
                 self.js_url = extract.js_url(self.embed_html)
-                self.js = await request.get(self.js_url)
+            self.js = await player_cache.get_js(self.js_url)
+        # base.js is only ever fetched by its url, the cipher is cached by it
+        assert self.js_url is not None
+        cipher = player_cache.get_cipher(self.js_url, self.js)
+
+        # https://github.com/nficano/pytube/issues/165
+        stream_maps = ["url_encoded_fmt_stream_map"]
+        if "adaptive_fmts" in self.player_config_args:
+            stream_maps.append("adaptive_fmts")
 
-            apply_signature(self.player_config_args, fmt, self.js)
+        # unscramble the progressive and adaptive stream manifests, the
+        # streams are only kept if all of them are built.
+        fmt_streams: List[Stream] = []
+        for fmt in stream_maps:
+            if not isinstance(self.player_config_args.get(fmt), list):
+                if (
+                    not self.age_restricted
+                    and self.vid_info is not None
+                    and fmt in self.vid_info
+                ):
+                    apply_descrambler(self.vid_info, fmt)
+                apply_descrambler(self.player_config_args, fmt)
+
+            # the signatures are deciphered by the streams whose url is read
+            apply_signature(self.player_config_args, fmt, self.js, defer=True)
 
             # build instances of :class:`Stream <Stream>`
-            self.initialize_stream_objects(fmt)
+            self.initialize_stream_objects(fmt, cipher, fmt_streams)
 
-        # load the player_response object (contains subtitle information)
-        self.player_response = json.loads(
-            self.player_config_args["player_response"]
-        )
+        self.fmt_streams = fmt_streams
         del self.player_config_args["player_response"]
-        self.stream_monostate.title = self.title
-        self.stream_monostate.duration = self.length
-
-        logger.info("init finished successfully")
 
-    async def prefetch(self) -> None:
+    async def prefetch(self, fetch_js: bool = True) -> None:
         """Eagerly download all necessary data.
 
         Eagerly executes all necessary network requests so all other
         operations don't does need to make calls outside of the interpreter
         which blocks for long periods of time.
 
+        Requests that don't depend on each other run concurrently: the
+        video_info url only needs the ``video_id``, so it is fetched together
+        with the watch page, and base.js is requested as soon as its url is
+        known.
+
+        :param bool fetch_js:
+            Whether to fetch base.js, which is only needed to decipher the
+            stream urls.
         :rtype: None
         """
-        self.watch_html = await request.get(url=self.watch_url)
-        if self.watch_html is None:
-            raise VideoUnavailable(video_id=self.video_id)
-        self.age_restricted = extract.is_age_restricted(self.watch_html)
-
-        if not self.age_restricted and (
-            "This video is private" in self.watch_html
-            or "This video is no longer available because the YouTube account "
-            "associated with this video has been terminated." in self.watch_html
-            or "This video is only available to Music Premium members"
-            in self.watch_html
-            or "This video is no longer available due to a copyright claim by"
-            in self.watch_html
-        ):
-            raise VideoUnavailable(video_id=self.video_id)
-
-        if self.age_restricted:
-            if not self.embed_html:
-                self.embed_html = await request.get(url=self.embed_url)
-            self.vid_info_url = extract.video_info_url_age_restricted(
-                self.video_id, self.watch_url
-            )
-        else:
-            self.vid_info_url = extract.video_info_url(
-                video_id=self.video_id, watch_url=self.watch_url
+        self.vid_info_url = extract.video_info_url(
+            video_id=self.video_id, watch_url=self.watch_url
+        )
+        vid_info = asyncio.ensure_future(request.get(self.vid_info_url))
+        try:
+            self.watch_html = await request.get(
+                url=self.watch_url,
+                until=extract.WATCH_HTML_CONFIG_END
+                if self.partial_watch_html
+                else None,
             )
+            if self.watch_html is None:
+                raise VideoUnavailable(video_id=self.video_id)
+            self.age_restricted = extract.is_age_restricted(self.watch_html)
+
+            if not self.age_restricted and (
+                "This video is private" in self.watch_html
+                or "This video is no longer available because the YouTube account "
+                "associated with this video has been terminated." in self.watch_html
+                or "This video is only available to Music Premium members"
+                in self.watch_html
+                or "This video is no longer available due to a copyright claim by"
+                in self.watch_html
+            ):
+                raise VideoUnavailable(video_id=self.video_id)
+
+            if self.age_restricted:
+                # the speculative request used the wrong video_info url
+                vid_info.cancel()
+                self.vid_info_url = extract.video_info_url_age_restricted(
+                    self.video_id, self.watch_url
+                )
+                vid_info = asyncio.ensure_future(
+                    request.get(self.vid_info_url)
+                )
+                if not self.embed_html:
+                    self.embed_html = await request.get(url=self.embed_url)
+                self.js_url = extract.js_url(self.embed_html)
+            else:
+                self.js_url = extract.js_url(self.watch_html)
 
-        self.vid_info_raw = await request.get(self.vid_info_url)
-        if not self.age_restricted:
-            self.js_url = extract.js_url(self.watch_html)
-            self.js = await request.get(self.js_url)
+            if fetch_js:
+                self.js, self.vid_info_raw = await asyncio.gather(
+                    player_cache.get_js(self.js_url), vid_info
+                )
+            else:
+                self.vid_info_raw = await vid_info
+        except BaseException:
+            vid_info.cancel()
+            raise
 
-    def initialize_stream_objects(self, fmt: str) -> None:
+    def initialize_stream_objects(
+        self,
+        fmt: str,
+        cipher: Optional[Cipher] = None,
+        fmt_streams: Optional[List[Stream]] = None,
+    ) -> None:
         """Convert manifest data to instances of :class:`Stream <Stream>`.
 
         Take the unscrambled stream data and uses it to initialize
@@ -228,26 +402,46 @@ class YouTube:
             Key in stream manifest (``ytplayer_config``) containing progressive
             download or adaptive streams (e.g.: ``url_encoded_fmt_stream_map``
             or ``adaptive_fmts``).
+        :param cipher:
+            (Optional) The :class:`Cipher <Cipher>` the streams decipher their
+            signature with.
+        :param list fmt_streams:
+            (Optional) The list the streams are added to, defaults to
+            ``fmt_streams``.
 
         :rtype: None
 
         """
+        if fmt_streams is None:
+            fmt_streams = self.fmt_streams
         stream_manifest = self.player_config_args[fmt]
         for stream in stream_manifest:
             video = Stream(
                 stream=stream,
                 player_config_args=self.player_config_args,
                 monostate=self.stream_monostate,
+                cipher=cipher,
             )
-            self.fmt_streams.append(video)
+            fmt_streams.append(video)
 
     @property
     def streams(self) -> StreamQuery:
         """Interface to query both adaptive (DASH) and progressive streams.
 
+        Objects created with ``lazy=True`` have to load them first with
+        ``await yt.load_streams()``.
+
         :rtype: :class:`StreamQuery <StreamQuery>`.
         """
-        return StreamQuery(self.fmt_streams)
+        if not self.streams_loaded and self.player_config_args:
+            raise PytubeError(
+                "streams are not loaded, await load_streams() first"
+            )
+        if self._stream_query is None or len(self._stream_query) != len(
+            self.fmt_streams
+        ):
+            self._stream_query = StreamQuery(list(self.fmt_streams))
+        return self._stream_query
 
     @property
     def thumbnail_url(self) -> str:
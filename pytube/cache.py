@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module contains a process wide cache of YouTube's player javascript.
+
+Every video served by the same player version references the same base.js,
+which is several megabytes large and has to be searched by a dozen regular
+expressions to build a :class:`Cipher <Cipher>`. Caching both by the url of
+the player means this work happens once per player version instead of once per
+video.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from pytube import request
+from pytube.cipher import Cipher
+from pytube.helpers import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerCache:
+    """LRU cache of base.js contents and their parsed ciphers."""
+
+    def __init__(self, maxsize: int = 16, cache_dir: Optional[str] = None):
+        """
+        :param int maxsize:
+            Number of player versions kept in memory.
+        :param str cache_dir:
+            (Optional) Directory the player javascript is persisted in, so it
+            survives restarts of the process.
+        """
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        # js_url -> [js, cipher (built on first use)]
+        self._entries: "OrderedDict[str, List]" = OrderedDict()
+        # the cache is shared by loops running in different threads
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    async def get_js(self, js_url: str) -> str:
+        """Get the contents of base.js.
+
+        Looks up the memory cache, then the disk cache, and only downloads the
+        file if both miss. Concurrent calls for the same url share a single
+        download within an event loop, loops running in other threads make
+        their own and share the cached result.
+
+        :param str js_url:
+            The url of the base.js asset file.
+        :rtype: str
+        """
+        with self._lock:
+            entry = self._entries.get(js_url)
+            if entry is not None:
+                self._entries.move_to_end(js_url)
+                return entry[0]
+
+        return await self._flight.do(js_url, lambda: self._load_js(js_url))
+
+    async def _load_js(self, js_url: str) -> str:
+        js = self._read(js_url)
+        if js is None:
+            js = await request.get(js_url)
+            self._write(js_url, js)
+        with self._lock:
+            self._store(js_url, js)
+        return js
+
+    def get_cipher(self, js_url: str, js: str) -> Cipher:
+        """Get the :class:`Cipher <Cipher>` parsed from base.js.
+
+        :param str js_url:
+            The url of the base.js asset file.
+        :param str js:
+            The contents of the base.js asset file.
+        :rtype: :class:`Cipher <Cipher>`
+        """
+        with self._lock:
+            entry = self._entries.get(js_url)
+            if entry is None or entry[0] != js:
+                entry = self._store(js_url, js)
+            else:
+                self._entries.move_to_end(js_url)
+        if entry[1] is None:
+            logger.debug("parsing cipher for %s", js_url)
+            entry[1] = Cipher(js=js)
+        return entry[1]
+
+    def clear(self) -> None:
+        """Remove all player versions from the memory cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, js_url: str, js: str) -> List:
+        # called with the lock held
+        entry = [js, None]
+        self._entries[js_url] = entry
+        self._entries.move_to_end(js_url)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _path(self, js_url: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        name = hashlib.sha1(js_url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.js")
+
+    def _read(self, js_url: str) -> Optional[str]:
+        path = self._path(js_url)
+        if path is None or not os.path.isfile(path):
+            return None
+        logger.debug("loading %s from %s", js_url, path)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                return fh.read()
+        except (OSError, UnicodeDecodeError) as e:
+            # fetched again, and the entry rewritten
+            logger.warning("could not load %s from %s: %s", js_url, path, e)
+            return None
+
+    def _write(self, js_url: str, js: str) -> None:
+        path = self._path(js_url)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                fh.write(js)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("could not persist %s: %s", js_url, e)
+
+
+# Shared between all instances of :class:`YouTube <YouTube>`.
+player_cache = PlayerCache()
@@ -17,7 +17,8 @@ signature and decoding it.
 import logging
 import re
 from itertools import chain
-from typing import List, Tuple, Dict, Callable, Any, Optional
+from operator import itemgetter
+from typing import List, Tuple, Dict, Callable, Any, Optional, Iterable
 
 from pytube.exceptions import RegexMatchError
 from pytube.helpers import regex_search, cache
@@ -31,12 +32,47 @@ class Cipher:
         var, _ = self.transform_plan[0].split(".")
         self.transform_map = get_transform_map(js, var)
         self.js_func_regex = re.compile(r"\w+\.(\w+)\(\w,(\d+)\)")
+        # signature length -> getter applying the whole transform plan at once
+        self._compiled_plans: Dict[int, Callable] = {}
 
     def get_signature(self, ciphered_signature: str) -> str:
         """Decipher the signature.
 
         Taking the ciphered signature, applies the transform functions.
 
+        :param str ciphered_signature:
+            The ciphered signature sent in the ``player_config``.
+        :rtype: str
+        :returns:
+           Decrypted signature required to download the media content.
+        """
+        if not ciphered_signature:
+            return ciphered_signature
+        if logger.isEnabledFor(logging.DEBUG):
+            return self.trace_signature(ciphered_signature)
+        plan = self._compiled_plans.get(len(ciphered_signature))
+        if plan is None:
+            plan = self.compile_plan(len(ciphered_signature))
+        return "".join(plan(ciphered_signature))
+
+    def get_signatures(self, ciphered_signatures: Iterable[str]) -> List[str]:
+        """Decipher several signatures at once.
+
+        :param ciphered_signatures:
+            The ciphered signatures of all streams in a manifest.
+        :rtype: list
+        :returns:
+            The decrypted signatures, in the same order.
+        """
+        return [self.get_signature(s) for s in ciphered_signatures]
+
+    def trace_signature(self, ciphered_signature: str) -> str:
+        """Decipher the signature one transform function at a time.
+
+        Slow path of :meth:`get_signature` used when debug logging is enabled,
+        logging the intermediate signature after every transform function. The
+        diagnostics are only built here, so they cost nothing otherwise.
+
         :param str ciphered_signature:
             The ciphered signature sent in the ``player_config``.
         :rtype: str
@@ -62,6 +98,31 @@ class Cipher:
 
         return "".join(signature)
 
+    def compile_plan(self, length: int) -> Callable:
+        """Compile the transform plan for signatures of a given length.
+
+        Every transform function only moves or drops characters depending on
+        their position, so running the plan over the positions themselves
+        yields, for each character of the deciphered signature, its index in
+        the ciphered one.
+
+        :param int length:
+            Length of the ciphered signature.
+        :rtype: callable
+        :returns:
+            A getter returning the deciphered characters of a signature.
+        """
+        indexes: List[int] = list(range(length))
+        for js_func in self.transform_plan:
+            name, argument = self.parse_function(js_func)  # type: ignore
+            indexes = self.transform_map[name](indexes, argument)
+        logger.debug(
+            "compiled transform plan for length %d: %s", length, indexes
+        )
+        plan = itemgetter(*indexes) if indexes else (lambda _: "")
+        self._compiled_plans[length] = plan
+        return plan
+
     @cache
     def parse_function(self, js_func: str) -> Tuple[str, int]:
         """Parse the Javascript transform function.
@@ -1,16 +1,16 @@
 # -*- coding: utf-8 -*-
 
 """Module to download a complete playlist from a youtube channel."""
-import json
 import logging
 import re
 from datetime import date, datetime
-from typing import List, Optional, Union, Tuple, AsyncGenerator
+from typing import Any, List, Optional, Union, Tuple, AsyncGenerator
 from urllib.parse import parse_qs
 from collections.abc import Sequence
 
 from pytube import request, YouTube
-from pytube.helpers import cache, deprecated, uniqueify
+from pytube.extract import get_json_object
+from pytube.helpers import cache, deprecated, uniqueify, json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +39,6 @@ class Playlist(Sequence):
         self._video_regex_2 = re.compile(r"<a[A-z0-9 \"-=]+href=\"(/watch\?v="
                                          r"[A-z0-9-_]{11})[A-z0-9 \"\-&_;=]+>"
                                          r"[\s]+([^<\n]+)[\s]+(</a>)?")
-        self._js_regex = re.compile(
-            r"window\[\"ytInitialData\"] = ([^\n]+)"
-        )
         self._video_urls = []
 
     @classmethod
@@ -127,12 +124,16 @@ class Playlist(Sequence):
         return uniqueify(_list)
 
     @staticmethod
-    def _extract_videos(raw_json: str) -> Tuple[
+    def _extract_videos(raw_json: Union[str, Any]) -> Tuple[
         List[Tuple[str, str]], Optional[str]]:
         """
+        @param raw_json: serialized or already parsed playlist data
         @returns: Tuple[Tuple[endpoint, title], Continuation[Optional]]
         """
-        initial_data = json.loads(raw_json)
+        if isinstance(raw_json, str):
+            initial_data = json_loads(raw_json)
+        else:
+            initial_data = raw_json
         try:
             important_content = \
                 initial_data["contents"]["twoColumnBrowseResultsRenderer"][
@@ -171,8 +172,11 @@ class Playlist(Sequence):
             )
         ), continuation
 
-    def _extract_json(self, html: str) -> str:
-        return self._js_regex.search(html).group(1)[0:-1]
+    @staticmethod
+    def _extract_json(html: str) -> Any:
+        return get_json_object(
+            html, ['window["ytInitialData"]', "var ytInitialData"]
+        )
 
     async def _fill_video_urls(self) -> None:
         """Complete links of all the videos in playlist
@@ -0,0 +1,863 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements downloading media streams over several connections.
+
+The file is split into byte ranges which are fetched concurrently over the
+pooled session and written straight to their position in a preallocated file,
+so the order in which ranges arrive doesn't matter.
+"""
+import asyncio
+import json
+import logging
+import mmap
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple, Union
+
+import aiohttp
+
+from pytube import request
+from pytube.exceptions import DownloadError
+from pytube.helpers import ByteBudget
+from pytube.tuning import Tuner
+
+logger = logging.getLogger(__name__)
+
+# Same default as :func:`request.stream`.
+RANGE_SIZE = 9437184  # 9MB
+# Received chunks are collected up to this size, then written by one syscall.
+WRITE_SIZE = 1048576  # 1MB
+# Maximum number of buffers passed to a single ``os.pwritev``.
+IOV_MAX = getattr(os, "sysconf", lambda _: 1024)("SC_IOV_MAX") or 1024
+
+OnChunk = Callable[[bytes, int], None]
+
+
+class FileSink:
+    """Preallocated file written to with positioned writes."""
+
+    def __init__(self, file_path: str, size: int):
+        """
+        :param str file_path:
+            Path of the file, it is created if it does not exist.
+        :param int size:
+            Final size of the file in bytes.
+        """
+        self.file_path = file_path
+        self.size = size
+        self.fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            preallocate(self.fd, size)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def write(self, offset: int, data: bytes) -> None:
+        """Write data at an offset of the file.
+
+        :param int offset:
+            Position of the first byte of ``data`` in the file.
+        :param bytes data:
+            The data to write.
+        """
+        pwrite(self.fd, data, offset)
+
+    def writev(self, offset: int, buffers: List[bytes]) -> None:
+        """Write consecutive buffers at an offset of the file.
+
+        :param int offset:
+            Position of the first byte of the first buffer in the file.
+        :param list buffers:
+            Bytes-like objects written one after the other, without joining
+            them first.
+        """
+        pwritev(self.fd, buffers, offset)
+
+    def close(self) -> None:
+        """Close the file."""
+        os.close(self.fd)
+
+
+class MmapSink:
+    """Preallocated file mapped into memory, ranges are copied into slices.
+
+    Every range is written by a memory copy into its own part of the mapping,
+    without a system call per write and without sharing a file position.
+    The file is complete on disk once closed, e.g.: ready to be passed to a
+    muxer.
+    """
+
+    def __init__(self, file_path: str, size: int):
+        """
+        :param str file_path:
+            Path of the file, it is created if it does not exist.
+        :param int size:
+            Final size of the file in bytes.
+        """
+        self.file_path = file_path
+        self.size = size
+        self.fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            preallocate(self.fd, size)
+            # an empty file can't be mapped, and has nothing to write
+            self.map = mmap.mmap(self.fd, size) if size else None
+        except (OSError, ValueError):
+            os.close(self.fd)
+            raise
+        self.view = memoryview(self.map) if self.map is not None else None
+
+    def slice(self, begin: int, end: int) -> memoryview:
+        """Get the writable part of the file holding a range.
+
+        :param int begin:
+            Offset of the first byte.
+        :param int end:
+            Offset of the last byte (inclusive).
+        :rtype: memoryview
+        """
+        if self.view is None:
+            raise DownloadError(f"range {begin}-{end} beyond empty file")
+        return self.view[begin : end + 1]
+
+    def write(self, offset: int, data: bytes) -> None:
+        """Copy data to an offset of the file.
+
+        :param int offset:
+            Position of the first byte of ``data`` in the file.
+        :param bytes data:
+            The data to write.
+        """
+        self.slice(offset, offset + len(data) - 1)[:] = data
+
+    def writev(self, offset: int, buffers: List[bytes]) -> None:
+        """Copy consecutive buffers to an offset of the file.
+
+        :param int offset:
+            Position of the first byte of the first buffer in the file.
+        :param list buffers:
+            Bytes-like objects written one after the other.
+        """
+        for buffer in buffers:
+            self.write(offset, buffer)
+            offset += len(buffer)
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if self.map is not None:
+            self.view.release()  # type: ignore
+            self.map.close()
+        os.close(self.fd)
+
+
+Sink = Union[FileSink, MmapSink]
+
+
+def open_sink(file_path: str, size: int, use_mmap: bool = False) -> Sink:
+    """Create the file a download is written to.
+
+    :param str file_path:
+        Path of the file.
+    :param int size:
+        Final size of the file in bytes.
+    :param bool use_mmap:
+        Whether to write through a memory mapping instead of ``pwrite``.
+    :rtype: :class:`FileSink <FileSink>` or :class:`MmapSink <MmapSink>`
+    """
+    if use_mmap:
+        return MmapSink(file_path, size)
+    return FileSink(file_path, size)
+
+
+def preallocate(fd: int, size: int) -> None:
+    """Reserve disk space for a file and set its size.
+
+    Reserving all the space upfront keeps the file from being fragmented when
+    ranges are written out of order.
+
+    :param int fd:
+        File descriptor opened for writing.
+    :param int size:
+        Size of the file in bytes.
+    """
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError as e:
+            # not supported by every file system, the size is set below
+            logger.debug("posix_fallocate failed: %s", e)
+    os.ftruncate(fd, size)
+
+
+def pwrite(fd: int, data: bytes, offset: int) -> None:
+    """Write all of ``data`` at an offset, without moving the file position.
+
+    :param int fd:
+        File descriptor opened for writing.
+    :param bytes data:
+        The data to write.
+    :param int offset:
+        Position of the first byte of ``data`` in the file.
+    """
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:  # pragma: no cover
+            # Windows, fine since writes never interleave within the loop.
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def pwritev(fd: int, buffers: List[bytes], offset: int) -> None:
+    """Write all buffers one after the other at an offset.
+
+    Uses a single ``pwritev`` system call where available instead of joining
+    the buffers (a copy) or writing each of them.
+
+    :param int fd:
+        File descriptor opened for writing.
+    :param list buffers:
+        Bytes-like objects to write.
+    :param int offset:
+        Position of the first byte in the file.
+    """
+    if not hasattr(os, "pwritev"):  # pragma: no cover
+        for buffer in buffers:
+            pwrite(fd, buffer, offset)
+            offset += len(buffer)
+        return
+    views = [memoryview(buffer) for buffer in buffers]
+    while views:
+        written = os.pwritev(fd, views[:IOV_MAX], offset)
+        offset += written
+        # drop what was written, a buffer may have been written partially
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if written:
+            views[0] = views[0][written:]
+
+
+def split_ranges(
+    start: int, stop: int, connections: int, range_size: int
+) -> Deque[Tuple[int, int]]:
+    """Split the bytes from start to stop into inclusive ranges.
+
+    Ranges are at most ``range_size`` large, but smaller when needed to give
+    every connection something to download.
+
+    :param int start:
+        Offset of the first byte.
+    :param int stop:
+        Offset after the last byte.
+    :param int connections:
+        Number of connections the ranges are spread over.
+    :param int range_size:
+        Maximum size of a range in bytes.
+    :rtype: deque
+    """
+    length = stop - start
+    size = max(1, min(range_size, -(-length // max(1, connections))))
+    return deque(
+        (offset, min(offset + size, stop) - 1)
+        for offset in range(start, stop, size)
+    )
+
+
+def response_size(response: aiohttp.ClientResponse) -> int:
+    """Get the size of the whole file from a response to a range request.
+
+    :param response:
+        Response to a request sent by :func:`request.open_range`.
+    :rtype: int
+    """
+    try:
+        if response.status == 206:
+            return int(response.headers["Content-Range"].split("/")[1])
+        return int(response.headers["Content-Length"])
+    except (KeyError, IndexError, ValueError):
+        raise DownloadError(f"unknown size of {response.url}")
+
+
+async def open_first_range(
+    url: str, range_size: int
+) -> Tuple[aiohttp.ClientResponse, int, Tuple[int, int]]:
+    """Request the first range of a file to learn its size.
+
+    :param str url:
+        The URL of the file.
+    :param int range_size:
+        Maximum size of the range in bytes.
+    :rtype: tuple
+    :returns:
+        The unread response, the size of the file and the range the response
+        contains.
+    """
+    response = await request.open_range(url, 0, range_size - 1)
+    try:
+        response.raise_for_status()
+        filesize = response_size(response)
+    except BaseException:
+        response.release()
+        raise
+    if response.status == 206:
+        return response, filesize, (0, min(range_size, filesize) - 1)
+    # range requests are not supported, the whole file is coming
+    return response, filesize, (0, filesize - 1)
+
+
+class RangeDownloader:
+    """Concurrent download of byte ranges of a file into a sink."""
+
+    def __init__(
+        self,
+        url: str,
+        sink: Sink,
+        ranges: Deque[Tuple[int, int]],
+        remaining: int,
+        on_chunk: Optional[OnChunk] = None,
+        on_range: Optional[Callable[[int, int], None]] = None,
+        tuner: Optional[Tuner] = None,
+        budget: Optional[ByteBudget] = None,
+    ):
+        """
+        :param str url:
+            The URL of the file.
+        :param sink:
+            Where the ranges are written to.
+        :param deque ranges:
+            Inclusive byte ranges to download, consumed by the workers. With a
+            ``tuner``, ranges larger than its ``range_size`` are split up as
+            they are consumed.
+        :param int remaining:
+            Number of bytes still missing from the file.
+        :param on_chunk:
+            (Optional) Called with every chunk written and the number of bytes
+            that are still missing.
+        :param on_range:
+            (Optional) Called with the first and last offset of every range
+            completely written.
+        :param tuner:
+            (Optional) Measures every range and chooses the size of the next.
+        :param budget:
+            (Optional) Shared limit of the bytes received but not written yet.
+        """
+        self.url = url
+        self.sink = sink
+        self.ranges = ranges
+        self.remaining = remaining
+        self.on_chunk = on_chunk
+        self.on_range = on_range
+        self.tuner = tuner
+        self.budget = budget
+
+    async def run(
+        self,
+        connections: int,
+        first: Optional[aiohttp.ClientResponse] = None,
+        first_range: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """Download all ranges.
+
+        :param int connections:
+            Number of ranges downloaded at the same time.
+        :param first:
+            (Optional) An unread response to a range request that was already
+            sent, e.g.: to learn the size of the file.
+        :param tuple first_range:
+            The range ``first`` contains.
+        """
+        tasks: List[asyncio.Future] = [
+            asyncio.ensure_future(self._worker(first, first_range))
+        ]
+        tasks.extend(
+            asyncio.ensure_future(self._worker())
+            for _ in range(min(connections, len(self.ranges) + 1) - 1)
+        )
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if first is not None:
+                first.release()
+            raise
+
+    async def _worker(
+        self,
+        response: Optional[aiohttp.ClientResponse] = None,
+        response_range: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        if response is not None and response_range is not None:
+            await self._fetch(*response_range, response=response)
+        while self.ranges:
+            await self._fetch(*self._next_range())
+
+    def _next_range(self) -> Tuple[int, int]:
+        begin, end = self.ranges.popleft()
+        if self.tuner is not None and end - begin + 1 > self.tuner.range_size:
+            self.ranges.appendleft((begin + self.tuner.range_size, end))
+            end = begin + self.tuner.range_size - 1
+        return begin, end
+
+    async def _fetch(
+        self,
+        begin: int,
+        end: int,
+        response: Optional[aiohttp.ClientResponse] = None,
+    ) -> None:
+        """Download a range, resuming from the last byte written if the
+        connection fails, as allowed by ``request.retry_policy``."""
+        policy = request.retry_policy
+        offset = begin
+        failures = 0
+        while True:
+            attempt_offset = offset
+            # the round trip of a response opened by the caller is unknown
+            measured = response is None
+            try:
+                async with request.throttle_slot(self.url) as slot:
+                    if response is None:
+                        response = await request.open_range(
+                            self.url, offset, end, slot
+                        )
+                    else:
+                        slot.observe(response)
+                    async with response:
+                        response.raise_for_status()
+                        if response.status != 206 and (
+                            offset != 0 or end != self.sink.size - 1
+                        ):
+                            raise DownloadError(
+                                f"range requests unsupported by {self.url}"
+                            )
+                        buffers: List[bytes] = []
+                        buffered = 0
+                        try:
+                            # chunks as they were received, without slicing
+                            # them to a fixed size
+                            async for chunk in response.content.iter_any():
+                                if offset + buffered + len(chunk) > end + 1:
+                                    raise DownloadError(
+                                        f"range {begin}-{end} overflowed"
+                                    )
+                                await slot.consume(len(chunk))
+                                if (
+                                    self.budget is not None
+                                    and not self.budget.try_acquire(len(chunk))
+                                ):
+                                    # write what is held before waiting, or
+                                    # the workers could wait for each other
+                                    offset = self._flush(offset, buffers)
+                                    buffered = 0
+                                    await self.budget.acquire(len(chunk))
+                                buffers.append(chunk)
+                                buffered += len(chunk)
+                                if buffered >= WRITE_SIZE:
+                                    offset = self._flush(offset, buffers)
+                                    buffered = 0
+                        finally:
+                            # keep what arrived, for a retry to continue after
+                            offset = self._flush(offset, buffers)
+                if offset != end + 1:
+                    raise aiohttp.ClientPayloadError(
+                        f"range {begin}-{end} ended at {offset}"
+                    )
+                if self.tuner is not None and measured:
+                    self.tuner.record(
+                        offset - attempt_offset,
+                        time.monotonic() - slot.started,
+                        slot.latency or 0,
+                    )
+                break
+            except Exception as e:  # pylint: disable=broad-except
+                response = None
+                # only consecutive attempts without progress count
+                failures = 1 if offset > attempt_offset else failures + 1
+                if failures >= policy.attempts or not policy.is_retryable(e):
+                    if isinstance(e, aiohttp.ClientPayloadError):
+                        raise DownloadError(str(e)) from e
+                    raise
+                if self.tuner is not None:
+                    self.tuner.record_failure()
+                request.counters["range_resumes"] += 1
+                logger.debug(
+                    "resuming range %d-%d at %d after %r", begin, end, offset, e
+                )
+                await asyncio.sleep(policy.delay(failures))
+        if self.on_range:
+            self.on_range(begin, end)
+
+    def _flush(self, offset: int, buffers: List[bytes]) -> int:
+        """Write and clear the buffers, returning the offset after them."""
+        if not buffers:
+            return offset
+        try:
+            self.sink.writev(offset, buffers)
+        finally:
+            if self.budget is not None:
+                self.budget.release(sum(len(chunk) for chunk in buffers))
+        for chunk in buffers:
+            offset += len(chunk)
+            self.remaining -= len(chunk)
+            if self.on_chunk:
+                self.on_chunk(chunk, self.remaining)
+        buffers.clear()
+        return offset
+
+
+async def download(
+    url: str,
+    file_path: str,
+    filesize: Optional[int] = None,
+    connections: int = 4,
+    range_size: int = RANGE_SIZE,
+    on_chunk: Optional[OnChunk] = None,
+    tuner: Optional[Tuner] = None,
+    use_mmap: bool = False,
+    budget: Optional[ByteBudget] = None,
+) -> int:
+    """Download a file over several concurrent connections.
+
+    When the size isn't known, it is read from the response to the first range,
+    which is then downloaded like any other.
+
+    :param str url:
+        The URL of the file.
+    :param str file_path:
+        Where the file is written to.
+    :param int filesize:
+        (Optional) Size of the file in bytes, if already known.
+    :param int connections:
+        Number of ranges downloaded at the same time.
+    :param int range_size:
+        Maximum size of a range in bytes.
+    :param on_chunk:
+        (Optional) Called with every chunk written and the number of bytes
+        that are still missing.
+    :param tuner:
+        (Optional) A :class:`Tuner <pytube.tuning.Tuner>` choosing the size of
+        the ranges from their measured throughput, up to its
+        ``max_range_size`` instead of ``range_size``.
+    :param bool use_mmap:
+        Write the file through a memory mapping, see
+        :class:`MmapSink <MmapSink>`.
+    :param budget:
+        (Optional) Limit of the bytes held in memory, shared with other
+        downloads.
+    :rtype: int
+    :returns:
+        Size of the file in bytes.
+    """
+    first_size = range_size
+    if tuner is not None:
+        first_size, range_size = tuner.range_size, tuner.max_range_size
+    first: Optional[aiohttp.ClientResponse] = None
+    first_range: Optional[Tuple[int, int]] = None
+    if filesize is None:
+        first, filesize, first_range = await open_first_range(url, first_size)
+    start = first_range[1] + 1 if first_range else 0
+    ranges = split_ranges(start, filesize, connections, range_size)
+
+    try:
+        sink = open_sink(file_path, filesize, use_mmap)
+    except BaseException:
+        if first is not None:
+            first.release()
+        raise
+    try:
+        await RangeDownloader(
+            url, sink, ranges, filesize, on_chunk, tuner=tuner, budget=budget
+        ).run(connections, first, first_range)
+    finally:
+        sink.close()
+    logger.debug("downloaded %d bytes to %s", filesize, file_path)
+    return filesize
+
+
+class Manifest:
+    """Checkpoint of a resumable download, stored next to the partial file.
+
+    It records which ranges of the file have been written completely, along
+    with the validators needed to tell whether the remote file is still the
+    same when the download is resumed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        url: str,
+        itag: Optional[int],
+        filesize: int,
+        completed: Optional[List[List[int]]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        :param str path:
+            Where the manifest is stored.
+        :param str url:
+            The URL of the file.
+        :param int itag:
+            (Optional) YouTube format identifier code of the file.
+        :param int filesize:
+            Size of the file in bytes.
+        :param list completed:
+            (Optional) Sorted, inclusive ranges already written.
+        :param str etag:
+            (Optional) ``ETag`` header of the file.
+        :param str last_modified:
+            (Optional) ``Last-Modified`` header of the file.
+        """
+        self.path = path
+        self.url = url
+        self.itag = itag
+        self.filesize = filesize
+        self.completed: List[List[int]] = completed or []
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Manifest"]:
+        """Load a manifest, if it exists and is readable.
+
+        :param str path:
+            Where the manifest is stored.
+        :rtype: :class:`Manifest <Manifest>` or None
+        """
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            return cls(
+                path,
+                url=data["url"],
+                itag=data["itag"],
+                filesize=int(data["filesize"]),
+                completed=[[int(b), int(e)] for b, e in data["completed"]],
+                etag=data.get("etag"),
+                last_modified=data.get("last_modified"),
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug("ignoring manifest %s: %s", path, e)
+            return None
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "url": self.url,
+                    "itag": self.itag,
+                    "filesize": self.filesize,
+                    "completed": self.completed,
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                },
+                fh,
+            )
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        """Delete the manifest from disk."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def add(self, begin: int, end: int) -> None:
+        """Mark a range as written, merging it with adjacent ranges.
+
+        :param int begin:
+            Offset of the first byte.
+        :param int end:
+            Offset of the last byte (inclusive).
+        """
+        merged: List[List[int]] = []
+        for r in sorted(self.completed + [[begin, end]]):
+            if merged and r[0] <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], r[1])
+            else:
+                merged.append(list(r))
+        self.completed = merged
+
+    @property
+    def completed_size(self) -> int:
+        """Number of bytes already written.
+
+        :rtype: int
+        """
+        return sum(end - begin + 1 for begin, end in self.completed)
+
+    def missing(self) -> List[Tuple[int, int]]:
+        """Get the ranges not written yet.
+
+        :rtype: list
+        :returns:
+            Gaps as tuples of their first offset and the offset after them.
+        """
+        gaps = []
+        offset = 0
+        for begin, end in self.completed:
+            if begin > offset:
+                gaps.append((offset, begin))
+            offset = end + 1
+        if offset < self.filesize:
+            gaps.append((offset, self.filesize))
+        return gaps
+
+    def matches(self, response: aiohttp.ClientResponse) -> bool:
+        """Whether a range response still belongs to the same file.
+
+        :param response:
+            Response to a request sent by :func:`request.open_range`.
+        :rtype: bool
+        """
+        if response.status != 206:
+            return False
+        try:
+            if response_size(response) != self.filesize:
+                return False
+        except DownloadError:
+            return False
+        etag = response.headers.get("ETag")
+        if self.etag and etag and etag != self.etag:
+            return False
+        last_modified = response.headers.get("Last-Modified")
+        if self.last_modified and last_modified:
+            return last_modified == self.last_modified
+        return True
+
+
+async def download_resumable(
+    url: str,
+    file_path: str,
+    itag: Optional[int] = None,
+    connections: int = 4,
+    range_size: int = RANGE_SIZE,
+    on_chunk: Optional[OnChunk] = None,
+    tuner: Optional[Tuner] = None,
+    use_mmap: bool = False,
+    budget: Optional[ByteBudget] = None,
+) -> int:
+    """Download a file so that it can be resumed after an interruption.
+
+    The file is written to ``<file_path>.part``, and the ranges completed so
+    far are recorded in the manifest ``<file_path>.part.json``. If both exist,
+    only the missing ranges are downloaded, unless the remote file changed in
+    the meantime, in which case it starts over. The partial file is renamed to
+    ``file_path`` once it is complete.
+
+    :param str url:
+        The URL of the file, it doesn't need to be the one it was started with.
+    :param str file_path:
+        Where the file is written to.
+    :param int itag:
+        (Optional) YouTube format identifier code of the file, a manifest of
+        another format isn't resumed.
+    :param int connections:
+        Number of ranges downloaded at the same time.
+    :param int range_size:
+        Maximum size of a range in bytes.
+    :param on_chunk:
+        (Optional) Called with every chunk written and the number of bytes
+        that are still missing.
+    :param tuner:
+        (Optional) A :class:`Tuner <pytube.tuning.Tuner>` choosing the size of
+        the ranges from their measured throughput, up to its
+        ``max_range_size`` instead of ``range_size``.
+    :param bool use_mmap:
+        Write the file through a memory mapping, see
+        :class:`MmapSink <MmapSink>`.
+    :param budget:
+        (Optional) Limit of the bytes held in memory, shared with other
+        downloads.
+    :rtype: int
+    :returns:
+        Size of the file in bytes.
+    """
+    first_size = range_size
+    if tuner is not None:
+        first_size, range_size = tuner.range_size, tuner.max_range_size
+    part_path = f"{file_path}.part"
+    manifest_path = f"{part_path}.json"
+    manifest = None
+    if os.path.exists(part_path):
+        manifest = Manifest.load(manifest_path)
+        if manifest is not None and manifest.itag != itag:
+            manifest = None
+
+    first: Optional[aiohttp.ClientResponse] = None
+    first_range: Optional[Tuple[int, int]] = None
+    if manifest is not None:
+        gaps = manifest.missing()
+        if gaps:
+            begin = gaps[0][0]
+            end = min(gaps[0][1], begin + first_size) - 1
+            first = await request.open_range(url, begin, end)
+            if manifest.matches(first):
+                first_range = (begin, end)
+                gaps[0] = (end + 1, gaps[0][1])
+                logger.debug(
+                    "resuming %s at %d of %d bytes",
+                    file_path,
+                    manifest.completed_size,
+                    manifest.filesize,
+                )
+            else:
+                logger.debug("remote file changed, restarting %s", file_path)
+                first.release()
+                manifest = first = None
+    if manifest is None:
+        first, filesize, first_range = await open_first_range(url, first_size)
+        manifest = Manifest(
+            manifest_path,
+            url,
+            itag,
+            filesize,
+            etag=first.headers.get("ETag"),
+            last_modified=first.headers.get("Last-Modified"),
+        )
+        gaps = [(first_range[1] + 1, filesize)]
+    manifest.url = url
+
+    ranges: Deque[Tuple[int, int]] = deque()
+    for gap_start, gap_stop in gaps:
+        ranges.extend(
+            split_ranges(gap_start, gap_stop, connections, range_size)
+        )
+
+    try:
+        manifest.save()
+        sink = open_sink(part_path, manifest.filesize, use_mmap)
+    except BaseException:
+        if first is not None:
+            first.release()
+        raise
+
+    def on_range(begin: int, end: int) -> None:
+        manifest.add(begin, end)  # type: ignore
+        manifest.save()  # type: ignore
+
+    try:
+        await RangeDownloader(
+            url,
+            sink,
+            ranges,
+            manifest.filesize - manifest.completed_size,
+            on_chunk=on_chunk,
+            on_range=on_range,
+            tuner=tuner,
+            budget=budget,
+        ).run(connections, first, first_range)
+    finally:
+        sink.close()
+    os.replace(part_path, file_path)
+    manifest.remove()
+    logger.debug("downloaded %d bytes to %s", manifest.filesize, file_path)
+    return manifest.filesize
@@ -60,3 +60,7 @@ class VideoUnavailable(PytubeError):
 
 class HTMLParseError(PytubeError):
     """HTML could not be parsed"""
+
+
+class DownloadError(PytubeError):
+    """Media could not be downloaded completely."""
@@ -17,10 +17,14 @@ from pytube.exceptions import (
     LiveStreamError,
     VideoUnavailable,
 )
-from pytube.helpers import regex_search
+from pytube.helpers import regex_search, json_loads
 
 logger = logging.getLogger(__name__)
 
+# Follows the player configurations in the inline script of the watch html,
+# nothing after it is needed to build the streams.
+WATCH_HTML_CONFIG_END = "ytplayer.load"
+
 
 class PytubeHTMLParser(HTMLParser):
     in_vid_descr = False
@@ -197,46 +201,102 @@ def get_ytplayer_config(html: str) -> Any:
     :returns:
         Substring of the html containing the encoded manifest data.
     """
-    config_patterns = [
-        r";ytplayer\.config\s*=\s*({.+?});ytplayer",
-        r";ytplayer\.config\s*=\s*({.*?});\(function"
-        r";ytplayer\.config\s*=\s*({.*?});",
-        r";yt\.setConfig\(\{'PLAYER_CONFIG':\s*(\{.*})}\);",
-        r";yt\.setConfig\(\{'PLAYER_CONFIG':\s*(\{.*})(,'EXPERIMENT_FLAGS'|;)",
-        r"<script\s?>yt\.setConfig\({.+'PLAYER_CONFIG':\s*({.+}})}\);yt"
-        # noqa: E501
+    config_markers = [
+        ";ytplayer.config",
+        "'PLAYER_CONFIG':",
     ]
-    logger.debug("finding initial function name")
-    for pattern in config_patterns:
-        regex = re.compile(pattern)
-        function_match = regex.search(html)
-        if function_match:
-            logger.debug("finished regex search, matched: %s", pattern)
-            yt_player_config = function_match.group(1)
-            return json.loads(yt_player_config)
-
-    raise RegexMatchError(
-        caller="get_ytplayer_config", pattern="config_patterns"
-    )
+    logger.debug("finding ytplayer config")
+    try:
+        return get_json_object(html, config_markers)
+    except RegexMatchError:
+        raise RegexMatchError(
+            caller="get_ytplayer_config", pattern="config_markers"
+        )
 
 
 def get_ytplayer_context_config(html: str) -> dict:
-    config_patterns = [
-        r"ytplayer\.web_player_context_config\s=\s({.*});\(function"
-    ]
+    config_markers = ["ytplayer.web_player_context_config"]
 
     logger.debug("finding context config")
-    for pattern in config_patterns:
-        regex = re.compile(pattern)
-        function_match = regex.search(html)
-        if function_match:
-            logger.debug("finished regex search, matched: %s", pattern)
-            yt_player_config = function_match.group(1)
-            return json.loads(yt_player_config)
-
-    raise RegexMatchError(
-        caller="get_ytplayer_context_config", pattern="context_config_patterns"
-    )
+    try:
+        return get_json_object(html, config_markers)
+    except RegexMatchError:
+        raise RegexMatchError(
+            caller="get_ytplayer_context_config",
+            pattern="context_config_markers",
+        )
+
+
+def get_json_object(html: str, markers: List[str]) -> Any:
+    """Get the json object assigned right after a marker in the html.
+
+    Finds the marker with :meth:`str.find` and decodes the object following
+    it (after an optional ``=`` or ``:``) with
+    :meth:`json.JSONDecoder.raw_decode`, which stops at the end of the object.
+    Unlike searching the page with regular expressions, the cost is linear in
+    the size of the object and nothing after it is scanned.
+
+    **Example**:
+
+    >>> get_json_object('<script>var a = {"b": 1};</script>', ["var a"])
+    {'b': 1}
+
+    :param str html:
+        The html contents of a page.
+    :param list markers:
+        Substrings preceding the object, tried in order.
+    :rtype: dict
+    """
+    for marker in markers:
+        index = html.find(marker)
+        while index != -1:
+            start = _skip_assignment(html, index + len(marker))
+            if start < len(html) and html[start] in "{[":
+                try:
+                    obj, _ = _json_decoder.raw_decode(html, start)
+                except ValueError:
+                    pass
+                else:
+                    logger.debug("finished json search, matched: %s", marker)
+                    return obj
+            index = html.find(marker, index + 1)
+
+    raise RegexMatchError(caller="get_json_object", pattern="markers")
+
+
+_json_decoder = json.JSONDecoder()
+
+
+def _skip_assignment(html: str, index: int) -> int:
+    """Get the index after whitespace and one ``=`` or ``:`` at ``index``."""
+    length = len(html)
+    while index < length and html[index].isspace():
+        index += 1
+    if index < length and html[index] in "=:":
+        index += 1
+        while index < length and html[index].isspace():
+            index += 1
+    return index
+
+
+def get_player_response(config_args: Dict) -> Dict:
+    """Get the parsed ``player_response`` of the player configuration.
+
+    ``player_response`` is a large json document serialized into a string.
+    It is parsed on first access and the result replaces the string in
+    ``config_args``, so every later consumer shares the same object.
+
+    :param dict config_args:
+        The ``args`` of the player configuration, or the video info.
+    :rtype: dict
+    """
+    player_response = config_args.get("player_response")
+    if player_response is None:
+        return {}
+    if isinstance(player_response, (str, bytes)):
+        player_response = json_loads(player_response)
+        config_args["player_response"] = player_response
+    return player_response
 
 
 def _get_vid_descr(html: Optional[str]) -> str:
@@ -246,7 +306,13 @@ def _get_vid_descr(html: Optional[str]) -> str:
     return html_parser.vid_descr
 
 
-def apply_signature(config_args: Dict, fmt: str, js: str) -> None:
+def apply_signature(
+    config_args: Dict,
+    fmt: str,
+    js: str,
+    cipher: Optional[Cipher] = None,
+    defer: bool = False,
+) -> None:
     """Apply the decrypted signature to the stream manifest.
 
     :param dict config_args:
@@ -257,20 +323,24 @@ def apply_signature(config_args: Dict, fmt: str, js: str) -> None:
         ``adaptive_fmts``).
     :param str js:
         The contents of the base.js asset file.
+    :param cipher:
+        (Optional) A :class:`Cipher <Cipher>` already parsed from ``js``.
+    :param bool defer:
+        Don't decipher the signatures, the ones that need it are left in the
+        ``s`` key of their stream for :class:`Stream <Stream>` to decipher
+        when its url is read.
 
     """
-    cipher = Cipher(js=js)
     stream_manifest = config_args[fmt]
+    ciphered = []
 
-    for i, stream in enumerate(stream_manifest):
+    for stream in stream_manifest:
         try:
             url: str = stream["url"]
         except KeyError:
-            live_stream = (
-                json.loads(config_args["player_response"])
-                    .get("playabilityStatus", {}, )
-                    .get("liveStreamability")
-            )
+            live_stream = get_player_response(config_args).get(
+                "playabilityStatus", {}
+            ).get("liveStreamability")
             if live_stream:
                 raise LiveStreamError("UNKNOWN")
         # 403 Forbidden fix.
@@ -282,15 +352,23 @@ def apply_signature(config_args: Dict, fmt: str, js: str) -> None:
             # which case there's no real magic to download them and we can skip
             # the whole signature descrambling entirely.
             logger.debug("signature found, skip decipher")
+            stream.pop("s", None)
             continue
-
-        signature = cipher.get_signature(ciphered_signature=stream["s"])
-
-        logger.debug(
-            "finished descrambling signature for itag=%s", stream["itag"]
-        )
+        ciphered.append(stream)
+
+    if defer:
+        return
+    if cipher is None:
+        cipher = Cipher(js=js)
+    signatures = cipher.get_signatures(stream.pop("s") for stream in ciphered)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for stream, signature in zip(ciphered, signatures):
+        if debug:
+            logger.debug(
+                "finished descrambling signature for itag=%s", stream["itag"]
+            )
         # 403 forbidden fix
-        stream_manifest[i]["url"] = url + "&sig=" + signature
+        stream["url"] = stream["url"] + "&sig=" + signature
 
 
 def apply_descrambler(stream_data: Dict, key: str) -> None:
@@ -320,7 +398,7 @@ def apply_descrambler(stream_data: Dict, key: str) -> None:
             "url_encoded_fmt_stream_map"
     ):
         formats = []
-        player_response = json.loads(stream_data["player_response"])
+        player_response = get_player_response(stream_data)
         if player_response["playabilityStatus"]["status"] == "UNPLAYABLE":
             raise VideoUnavailable(player_response["videoDetails"]["videoId"])
         if "formats" in player_response["streamingData"]:
@@ -336,6 +414,10 @@ def apply_descrambler(stream_data: Dict, key: str) -> None:
                     "itag": format_item["itag"],
                     "bitrate": format_item.get("bitrate"),
                     "is_otf": (format_item.get("type") == otf_type),
+                    "width": format_item.get("width"),
+                    "height": format_item.get("height"),
+                    "fps": format_item.get("fps"),
+                    "content_length": format_item.get("contentLength"),
                 }
                 for format_item in formats
             ]
@@ -357,6 +439,10 @@ def apply_descrambler(stream_data: Dict, key: str) -> None:
                     "itag": format_item["itag"],
                     "bitrate": format_item.get("bitrate"),
                     "is_otf": (format_item.get("type") == otf_type),
+                    "width": format_item.get("width"),
+                    "height": format_item.get("height"),
+                    "fps": format_item.get("fps"),
+                    "content_length": format_item.get("contentLength"),
                 }
                 for i, format_item in enumerate(formats)
             ]
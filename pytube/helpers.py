@@ -1,15 +1,38 @@
 # -*- coding: utf-8 -*-
 
 """Various helper functions implemented by pytube."""
+import asyncio
 import functools
+import json
 import logging
 import os
 import re
+import threading
+import time
 import warnings
-from typing import TypeVar, Callable, Optional, Dict, List, Any
+from collections import OrderedDict
+from types import ModuleType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from urllib.parse import parse_qs, urlsplit
 
 from pytube.exceptions import RegexMatchError
 
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +59,24 @@ def regex_search(pattern: str, string: str, group: int) -> str:
 
     return results.group(group)
 
+
+def json_loads(raw: Union[str, bytes]) -> Any:
+    """Deserialize a json document.
+
+    Uses `orjson <https://github.com/ijl/orjson>`_ when it is installed, which
+    is considerably faster on the large documents embedded in YouTube's pages,
+    and the standard library otherwise.
+
+    :param raw:
+        The json document.
+    :type raw:
+        str or bytes
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def setup_logger(level: int = logging.ERROR):
     """Create a configured instance of logger.
 
@@ -63,6 +104,226 @@ def cache(func: Callable[..., GenericType]) -> GenericType:
     return functools.lru_cache()(func)  # type: ignore
 
 
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    Calls are only shared within an event loop, callers on loops running in
+    other threads make their own call.
+
+    **Example**:
+
+    >>> flight = SingleFlight()
+    >>> await asyncio.gather(
+    ...     flight.do("a", lambda: request.get(url)),
+    ...     flight.do("a", lambda: request.get(url)),
+    ... )  # a single request is sent
+
+    """
+
+    def __init__(self):
+        # (loop, key) -> future of the call in flight
+        self._pending: Dict[
+            Tuple[asyncio.AbstractEventLoop, Any], asyncio.Future
+        ] = {}
+
+    async def do(self, key: Any, func: Callable[[], Awaitable]) -> Any:
+        """Await ``func()``, unless a call with the same key is in flight.
+
+        :param key:
+            Hashable identifier of the call.
+        :param func:
+            Returns the awaitable to run if no call is in flight.
+        :returns:
+            The result of the call, or raises its exception.
+        """
+        loop = asyncio.get_running_loop()
+        pending_key = (loop, key)
+        while pending_key in self._pending:
+            future = self._pending[pending_key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the caller running the call was cancelled, take over
+
+        future = loop.create_future()
+        self._pending[pending_key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved if nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._pending[pending_key]
+        future.set_result(result)
+        return result
+
+
+class ByteBudget:
+    """Limit of the bytes held in memory across concurrent transfers.
+
+    Transfers acquire the size of every chunk they receive and release it once
+    the chunk is written or consumed. While the budget is used up, they stop
+    reading, so a slow consumer holds back the network instead of buffering
+    without bound.
+
+    A single acquisition larger than the whole budget is admitted when nothing
+    else is held, so it can't wait forever.
+    """
+
+    def __init__(self, limit: int):
+        """
+        :param int limit:
+            Maximum number of bytes held at the same time.
+        """
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self._waiters: "OrderedDict[asyncio.Future, int]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        """Number of transfers paused for the budget.
+
+        :rtype: int
+        """
+        return len(self._waiters)
+
+    def try_acquire(self, size: int) -> bool:
+        """Take bytes of the budget if available, without waiting.
+
+        :param int size:
+            Number of bytes.
+        :rtype: bool
+        """
+        if self._waiters or not self._fits(size):
+            return False
+        self._take(size)
+        return True
+
+    async def acquire(self, size: int) -> None:
+        """Take bytes of the budget, waiting until they are released.
+
+        :param int size:
+            Number of bytes.
+        """
+        if self.try_acquire(size):
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[waiter] = size
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(size)
+            else:
+                del self._waiters[waiter]
+                self._wake()
+            raise
+
+    def release(self, size: int) -> None:
+        """Give back bytes of the budget.
+
+        :param int size:
+            Number of bytes, as acquired before.
+        """
+        self.used -= size
+        self._wake()
+
+    def _fits(self, size: int) -> bool:
+        return self.used + size <= self.limit or self.used == 0
+
+    def _take(self, size: int) -> None:
+        self.used += size
+        self.peak = max(self.peak, self.used)
+
+    def _wake(self) -> None:
+        # first come, first served, so large chunks can't be starved
+        while self._waiters:
+            waiter, size = next(iter(self._waiters.items()))
+            if not self._fits(size):
+                break
+            del self._waiters[waiter]
+            self._take(size)
+            waiter.set_result(None)
+
+
+def async_cache(
+    maxsize: int = 128, expires: Optional[Callable[..., Optional[float]]] = None
+) -> Callable:
+    """Memoize the results of a coroutine function.
+
+    Unlike :func:`functools.lru_cache`, which would cache the coroutine
+    object itself, the awaited results are cached, and shared by all event
+    loops. Concurrent calls with the same arguments on the same loop share a
+    single call, the least recently used results are evicted once ``maxsize``
+    is reached and exceptions are not cached.
+
+    :param int maxsize:
+        Maximum number of cached results.
+    :param expires:
+        (Optional) Called with the arguments of the function, returns the
+        unix timestamp after which the result is stale, or None if it never
+        expires.
+    """
+
+    def decorator(func):
+        results: "OrderedDict[Any, Tuple[Any, Optional[float]]]" = OrderedDict()
+        # the results are shared by loops running in different threads
+        lock = threading.Lock()
+        flight = SingleFlight()
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                cached = results.get(key)
+                if cached is not None:
+                    result, expires_at = cached
+                    if expires_at is None or expires_at > time.time():
+                        results.move_to_end(key)
+                        return result
+                    del results[key]
+
+            result = await flight.do(key, lambda: func(*args, **kwargs))
+            expires_at = expires(*args, **kwargs) if expires else None
+            with lock:
+                results[key] = (result, expires_at)
+                while len(results) > maxsize:
+                    results.popitem(last=False)
+            return result
+
+        def cache_clear() -> None:
+            with lock:
+                results.clear()
+
+        wrapper.cache_clear = cache_clear  # type: ignore
+        return wrapper
+
+    return decorator
+
+
+def url_expiration(url: str) -> Optional[float]:
+    """Get the expiration of a signed url from its ``expire`` parameter.
+
+    :param str url:
+        A media url signed by YouTube.
+    :rtype: float or None
+    :returns:
+        Unix timestamp the url expires at, None if it has no expiration.
+    """
+    try:
+        return float(parse_qs(urlsplit(url).query)["expire"][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
 def deprecated(reason: str) -> Callable:
     """
     This is a decorator which can be used to mark functions
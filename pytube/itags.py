@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """This module contains a lookup table of YouTube's itag values."""
-from typing import Dict
+import functools
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional
 
 
 
@@ -94,13 +96,15 @@ ITAGS = {
     328: (None, None),
 }
 
-HDR = [330, 331, 332, 333, 334, 335, 336, 337]
-_60FPS = [298, 299, 302, 303, 308, 315] + HDR
-_3D = [82, 83, 84, 85, 100, 101, 102]
-LIVE = [91, 92, 93, 94, 95, 96, 132, 151]
-DASH_MP4_VIDEO = [133, 134, 135, 136, 137, 138, 160, 212, 264, 266, 298, 299]
-DASH_MP4_AUDIO = [139, 140, 141, 256, 258, 325, 328]
-DASH_WEBM_VIDEO = [
+HDR = frozenset([330, 331, 332, 333, 334, 335, 336, 337])
+_60FPS = frozenset([298, 299, 302, 303, 308, 315]) | HDR
+_3D = frozenset([82, 83, 84, 85, 100, 101, 102])
+LIVE = frozenset([91, 92, 93, 94, 95, 96, 132, 151])
+DASH_MP4_VIDEO = frozenset(
+    [133, 134, 135, 136, 137, 138, 160, 212, 264, 266, 298, 299]
+)
+DASH_MP4_AUDIO = frozenset([139, 140, 141, 256, 258, 325, 328])
+DASH_WEBM_VIDEO = frozenset([
     167,
     168,
     169,
@@ -122,30 +126,116 @@ DASH_WEBM_VIDEO = [
     308,
     313,
     315,
-]
-DASH_WEBM_AUDIO = [171, 172, 249, 250, 251]
+])
+DASH_WEBM_AUDIO = frozenset([171, 172, 249, 250, 251])
+DASH = DASH_MP4_VIDEO | DASH_MP4_AUDIO | DASH_WEBM_VIDEO | DASH_WEBM_AUDIO
 
 
-def get_format_profile(itag: int) -> Dict:
+class FormatProfile(NamedTuple):
+    """Immutable profile of a format, shared by all streams using it.
+
+    Fields can also be read by name like the keys of a dict, e.g.:
+    ``profile["resolution"]``.
+    """
+
+    resolution: Optional[str]
+    abr: Optional[str]
+    is_live: bool
+    is_3d: bool
+    is_hdr: bool
+    fps: int
+    is_dash: bool
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    def __getitem__(self, key):  # type: ignore
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+
+def _build_profile(itag: int) -> FormatProfile:
+    res, bitrate = ITAGS.get(itag, (None, None))
+    return FormatProfile(
+        resolution=res,
+        abr=bitrate,
+        is_live=itag in LIVE,
+        is_3d=itag in _3D,
+        is_hdr=itag in HDR,
+        fps=60 if itag in _60FPS else 30,
+        is_dash=itag in DASH,
+    )
+
+
+# Profile of every known itag, built at import.
+PROFILES: Mapping[int, FormatProfile] = MappingProxyType(
+    {
+        itag: _build_profile(itag)
+        for itag in set(ITAGS) | _60FPS | _3D | LIVE | DASH
+    }
+)
+
+# Profile of itags missing from the table.
+UNKNOWN_PROFILE = FormatProfile(
+    resolution=None,
+    abr=None,
+    is_live=False,
+    is_3d=False,
+    is_hdr=False,
+    fps=30,
+    is_dash=False,
+)
+
+
+def get_format_profile(
+    itag: int, format_item: Optional[Mapping] = None
+) -> FormatProfile:
     """Get additional format information for a given itag.
 
+    Profiles come from a table built at import, unknown itags get
+    ``UNKNOWN_PROFILE``. Both are shared, read only instances.
+
     :param str itag:
         YouTube format identifier code.
+    :param dict format_item:
+        (Optional) The format of the stream in the ``player_response``. Its
+        ``width``, ``height`` and ``fps`` take precedence over the table, and
+        ``height`` gives the resolution of video itags the table doesn't
+        know.
+    :rtype: :class:`FormatProfile <FormatProfile>`
     """
     itag = int(itag)
-    if itag in ITAGS:
-        res, bitrate = ITAGS[itag]
-    else:
-        res, bitrate = None, None
-    return {
-        "resolution": res,
-        "abr": bitrate,
-        "is_live": itag in LIVE,
-        "is_3d": itag in _3D,
-        "is_hdr": itag in HDR,
-        "fps": 60 if itag in _60FPS else 30,
-        "is_dash": itag in DASH_MP4_VIDEO
-        or itag in DASH_MP4_AUDIO
-        or itag in DASH_WEBM_VIDEO
-        or itag in DASH_WEBM_AUDIO,
-    }
+    profile = PROFILES.get(itag, UNKNOWN_PROFILE)
+    if not format_item:
+        return profile
+    width = format_item.get("width")
+    height = format_item.get("height")
+    fps = format_item.get("fps")
+    if width is None and height is None and fps is None:
+        return profile
+
+    mime_type = format_item.get("mimeType", format_item.get("type", ""))
+    return _enrich_profile(
+        itag, mime_type.startswith("video"), width, height, fps
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _enrich_profile(
+    itag: int, is_video: bool, width: Any, height: Any, fps: Any
+) -> FormatProfile:
+    """Build the profile of a stream from its player_response format, once
+    per distinct combination, so the streams sharing one share the record."""
+    profile = PROFILES.get(itag, UNKNOWN_PROFILE)
+    resolution = profile.resolution
+    if resolution is None and height and is_video:
+        resolution = f"{height}p"
+    return profile._replace(
+        resolution=resolution,
+        fps=int(fps) if fps else profile.fps,
+        width=int(width) if width else None,
+        height=int(height) if height else None,
+    )
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements downloading many streams within a memory budget.
+
+Every range of every active download reads into memory before it is written.
+With hundreds of downloads, nothing but a shared limit keeps a slow disk from
+letting the received data pile up, so all downloads of a
+:class:`DownloadManager <DownloadManager>` share one
+:class:`ByteBudget <pytube.helpers.ByteBudget>`, and pause their range
+fetches while it is used up.
+"""
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pytube.helpers import ByteBudget
+from pytube.streams import Stream
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadManager:
+    """Runs concurrent :class:`Stream <Stream>` downloads in a byte budget."""
+
+    def __init__(
+        self,
+        memory_budget: int = 268435456,
+        connections: int = 4,
+        max_downloads: int = 200,
+    ):
+        """
+        :param int memory_budget:
+            Maximum number of bytes received but not yet written, across all
+            downloads. Defaults to 256MB.
+        :param int connections:
+            Number of ranges of a single stream downloaded at the same time.
+        :param int max_downloads:
+            Maximum number of streams downloaded at the same time.
+        """
+        self.budget = ByteBudget(memory_budget)
+        self.connections = connections
+        self.max_downloads = max_downloads
+        self.active = 0
+        # created in the event loop it is used in
+        self._downloads: Optional[asyncio.Semaphore] = None
+
+    async def download(self, stream: Stream, file_path: str, **kwargs) -> str:
+        """Download a stream within the budget.
+
+        :param stream:
+            The :class:`Stream <Stream>` to download.
+        :param str file_path:
+            Where the media stream is written to.
+        :param kwargs:
+            Passed on to :meth:`Stream.download`, e.g.: ``resume``.
+        :rtype: str
+        :returns:
+            The path of the file.
+        """
+        kwargs.setdefault("connections", self.connections)
+        if self._downloads is None:
+            self._downloads = asyncio.Semaphore(self.max_downloads)
+        async with self._downloads:
+            self.active += 1
+            try:
+                return await stream.download(
+                    file_path, budget=self.budget, **kwargs
+                )
+            finally:
+                self.active -= 1
+
+    async def download_many(
+        self, jobs: Iterable[Tuple[Stream, str]], **kwargs
+    ) -> List[Union[str, BaseException]]:
+        """Download streams concurrently within the budget.
+
+        :param jobs:
+            Pairs of the stream to download and the path of its file.
+        :param kwargs:
+            Passed on to :meth:`Stream.download`.
+        :rtype: list
+        :returns:
+            The path of each file, or the exception its download failed with,
+            in the order of ``jobs``.
+        """
+        return await asyncio.gather(
+            *(
+                self.download(stream, file_path, **kwargs)
+                for stream, file_path in jobs
+            ),
+            return_exceptions=True,
+        )
+
+    def report(self) -> Dict[str, int]:
+        """Get the use of the memory budget.
+
+        :rtype: dict
+        :returns:
+            The ``limit`` of the budget, the bytes ``used`` now and at the
+            ``peak``, the number of range fetches ``waiting`` for the budget
+            and the number of ``active`` downloads.
+        """
+        return {
+            "limit": self.budget.limit,
+            "used": self.budget.used,
+            "peak": self.budget.peak,
+            "waiting": self.budget.waiting,
+            "active": self.active,
+        }
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from typing_extensions import Protocol
 
 
@@ -45,8 +45,12 @@ class Monostate:
         on_complete: Optional[OnComplete],
         title: Optional[str] = None,
         duration: Optional[int] = None,
+        video_id: Optional[str] = None,
+        player_config_args: Optional[Dict] = None,
     ):
         self.on_progress = on_progress
         self.on_complete = on_complete
         self.title = title
         self.duration = duration
+        self.video_id = video_id
+        self.player_config_args = player_config_args
@@ -1,24 +1,163 @@
 # -*- coding: utf-8 -*-
 
 """This module provides a query interface for media streams and captions."""
-from typing import Callable, List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 from collections.abc import Sequence
+from operator import attrgetter
 
 from pytube import Stream
 from pytube.helpers import deprecated
 
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class StreamIndex:
+    """Attribute indexes of a list of streams, built on first use.
+
+    Streams are referred to by their position in the list. The queries
+    derived from a :class:`StreamQuery <StreamQuery>` share its index, so
+    each attribute is read and each index built once per list of streams.
+    The attributes of the streams are assumed not to change.
+    """
+
+    def __init__(self, streams: List[Stream]):
+        """
+        :param list streams:
+            list of :class:`Stream <Stream>` instances.
+        """
+        self.streams = streams
+        self.positions = {id(s): i for i, s in enumerate(streams)}
+        self._values: Dict[str, List[Any]] = {}
+        self._equal: Dict[str, Dict[Any, FrozenSet[int]]] = {}
+        self._numeric: Dict[str, List[Optional[int]]] = {}
+        self._itags: Optional[Dict[int, Stream]] = None
+
+    def values(self, attribute_name: str) -> List[Any]:
+        """Get the value of an attribute of each stream.
+
+        :param str attribute_name:
+            The name of the attribute.
+        :rtype: list
+        """
+        values = self._values.get(attribute_name)
+        if values is None:
+            values = self._values[attribute_name] = list(
+                map(attrgetter(attribute_name), self.streams)
+            )
+        return values
+
+    def lookup(self, attribute_name: str, value: Any) -> FrozenSet[int]:
+        """Get the positions of the streams with an attribute equal to a value.
+
+        :param str attribute_name:
+            The name of the attribute.
+        :param value:
+            The value to compare with.
+        :rtype: frozenset
+        """
+        index = self._equal.get(attribute_name)
+        if index is None:
+            positions: Dict[Any, List[int]] = {}
+            for i, v in enumerate(self.values(attribute_name)):
+                positions.setdefault(v, []).append(i)
+            index = self._equal[attribute_name] = {
+                v: frozenset(p) for v, p in positions.items()
+            }
+        return index.get(value, _EMPTY)
+
+    def numeric(self, attribute_name: str) -> List[Optional[int]]:
+        """Get the integer made of the digits of a string attribute of each
+        stream, e.g.: ``720`` for ``"720p"``, or None without digits.
+
+        :param str attribute_name:
+            The name of the attribute.
+        :rtype: list
+        """
+        keys = self._numeric.get(attribute_name)
+        if keys is None:
+            keys = self._numeric[attribute_name] = [
+                _digits(v) if isinstance(v, str) else None
+                for v in self.values(attribute_name)
+            ]
+        return keys
+
+    @property
+    def itag_index(self) -> Dict[int, Stream]:
+        """Streams by itag.
+
+        :rtype: dict
+        """
+        if self._itags is None:
+            self._itags = {int(s.itag): s for s in self.streams}
+        return self._itags
+
+
+def _digits(value: str) -> Optional[int]:
+    digits = "".join(filter(str.isdigit, value))
+    return int(digits) if digits else None
+
 
 class StreamQuery(Sequence):
-    """Interface for querying the available media streams."""
+    """Interface for querying the available media streams.
 
-    def __init__(self, fmt_streams):
+    Equality filters are answered by the attribute indexes of a
+    :class:`StreamIndex <StreamIndex>`, shared by all the queries derived from
+    the same list of streams.
+    """
+
+    def __init__(self, fmt_streams, index: Optional[StreamIndex] = None):
         """Construct a :class:`StreamQuery <StreamQuery>`.
 
         param list fmt_streams:
             list of :class:`Stream <Stream>` instances.
+        param index:
+            (optional) The :class:`StreamIndex <StreamIndex>` of a list of
+            streams ``fmt_streams`` is taken from, built if not given.
         """
         self.fmt_streams = fmt_streams
-        self.itag_index = {int(s.itag): s for s in fmt_streams}
+        self._index = index if index is not None else StreamIndex(fmt_streams)
+        self._positions: Optional[List[int]] = None
+        self._itag_index: Optional[Dict[int, Stream]] = None
+
+    @property
+    def itag_index(self) -> Dict[int, Stream]:
+        """Streams of the query by itag.
+
+        :rtype: dict
+        """
+        if self._itag_index is None:
+            if len(self.fmt_streams) == len(self._index.streams):
+                self._itag_index = self._index.itag_index
+            else:
+                self._itag_index = {int(s.itag): s for s in self.fmt_streams}
+        return self._itag_index
+
+    @property
+    def positions(self) -> List[int]:
+        """Positions of the streams of the query in the index.
+
+        :rtype: list
+        """
+        if self._positions is None:
+            positions = self._index.positions
+            self._positions = [positions[id(s)] for s in self.fmt_streams]
+        return self._positions
+
+    def _derive(self, positions: List[int]) -> "StreamQuery":
+        streams = self._index.streams
+        query = StreamQuery([streams[i] for i in positions], self._index)
+        query._positions = positions
+        return query
 
     def filter(
         self,
@@ -123,64 +262,76 @@ class StreamQuery(Sequence):
             list or None
 
         """
+        equal: List[Tuple[str, Any]] = []
         filters = []
         if res or resolution:
-            filters.append(lambda s: s.resolution == (res or resolution))
+            equal.append(("resolution", res or resolution))
 
         if fps:
-            filters.append(lambda s: s.fps == fps)
+            equal.append(("fps", fps))
 
         if mime_type:
-            filters.append(lambda s: s.mime_type == mime_type)
+            equal.append(("mime_type", mime_type))
 
         if type:
-            filters.append(lambda s: s.type == type)
+            equal.append(("type", type))
 
         if subtype or file_extension:
-            filters.append(lambda s: s.subtype == (subtype or file_extension))
+            equal.append(("subtype", subtype or file_extension))
 
         if abr or bitrate:
-            filters.append(lambda s: s.abr == (abr or bitrate))
+            equal.append(("abr", abr or bitrate))
 
         if video_codec:
-            filters.append(lambda s: s.video_codec == video_codec)
+            equal.append(("video_codec", video_codec))
 
         if audio_codec:
-            filters.append(lambda s: s.audio_codec == audio_codec)
+            equal.append(("audio_codec", audio_codec))
 
         if only_audio:
-            filters.append(
-                lambda s: (
-                    s.includes_audio_track and not s.includes_video_track
-                )
-            )
+            equal.append(("includes_audio_track", True))
+            equal.append(("includes_video_track", False))
 
         if only_video:
-            filters.append(
-                lambda s: (
-                    s.includes_video_track and not s.includes_audio_track
-                )
-            )
+            equal.append(("includes_video_track", True))
+            equal.append(("includes_audio_track", False))
 
         if progressive:
-            filters.append(lambda s: s.is_progressive)
+            equal.append(("is_progressive", True))
 
         if adaptive:
-            filters.append(lambda s: s.is_adaptive)
+            equal.append(("is_adaptive", True))
 
         if custom_filter_functions:
             filters.extend(custom_filter_functions)
 
         if is_dash is not None:
-            filters.append(lambda s: s.is_dash == is_dash)
+            equal.append(("is_dash", is_dash))
 
-        return self._filter(filters)
+        return self._filter(filters, equal)
 
-    def _filter(self, filters: List[Callable]) -> "StreamQuery":
-        fmt_streams = self.fmt_streams
-        for filter_lambda in filters:
-            fmt_streams = filter(filter_lambda, fmt_streams)
-        return StreamQuery(list(fmt_streams))
+    def _filter(
+        self,
+        filters: List[Callable],
+        equal: Optional[List[Tuple[str, Any]]] = None,
+    ) -> "StreamQuery":
+        positions = self.positions
+        if equal:
+            matches: Optional[FrozenSet[int]] = None
+            for attribute_name, value in equal:
+                found = self._index.lookup(attribute_name, value)
+                matches = found if matches is None else matches & found
+                if not matches:
+                    break
+            positions = [i for i in positions if i in matches]  # type: ignore
+        if filters:
+            streams = self._index.streams
+            positions = [
+                i
+                for i in positions
+                if all(filter_lambda(streams[i]) for filter_lambda in filters)
+            ]
+        return self._derive(positions)
 
     def order_by(self, attribute_name: str) -> "StreamQuery":
         """Apply a sort order. Filters out stream the do not have the attribute.
@@ -188,34 +339,19 @@ class StreamQuery(Sequence):
         :param str attribute_name:
             The name of the attribute to sort by.
         """
-        has_attribute = [
-            s
-            for s in self.fmt_streams
-            if getattr(s, attribute_name) is not None
-        ]
+        values = self._index.values(attribute_name)
+        has_attribute = [i for i in self.positions if values[i] is not None]
         # Check that the attributes have string values.
-        if has_attribute and isinstance(
-            getattr(has_attribute[0], attribute_name), str
-        ):
+        if has_attribute and isinstance(values[has_attribute[0]], str):
             # Try to return a StreamQuery sorted by the integer representations
             # of the values.
-            try:
-                return StreamQuery(
-                    sorted(
-                        has_attribute,
-                        key=lambda s: int(
-                            "".join(
-                                filter(str.isdigit, getattr(s, attribute_name))
-                            )
-                        ),  # type: ignore  # noqa: E501
-                    )
+            numeric = self._index.numeric(attribute_name)
+            if all(numeric[i] is not None for i in has_attribute):
+                return self._derive(
+                    sorted(has_attribute, key=lambda i: cast(int, numeric[i]))
                 )
-            except ValueError:
-                pass
 
-        return StreamQuery(
-            sorted(has_attribute, key=lambda s: getattr(s, attribute_name))
-        )
+        return self._derive(sorted(has_attribute, key=lambda i: values[i]))
 
     def desc(self) -> "StreamQuery":
         """Sort streams in descending order.
@@ -223,7 +359,7 @@ class StreamQuery(Sequence):
         :rtype: :class:`StreamQuery <StreamQuery>`
 
         """
-        return StreamQuery(self.fmt_streams[::-1])
+        return self._derive(self.positions[::-1])
 
     def asc(self) -> "StreamQuery":
         """Sort streams in ascending order.
@@ -310,7 +446,7 @@ class StreamQuery(Sequence):
         :rtype: :class:`StreamQuery <StreamQuery>`
         :returns: A StreamQuery object with otf filtered streams
         """
-        return self._filter([lambda s: s.is_otf == is_otf])
+        return self._filter([], [("is_otf", is_otf)])
 
     def first(self) -> Optional[Stream]:
         """Get the first :class:`Stream <Stream>` in the results.
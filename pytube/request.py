@@ -1,69 +1,604 @@
 # -*- coding: utf-8 -*-
 
 """Implements a simple wrapper around aiohttp."""
+import asyncio
+import codecs
 import logging
-from functools import lru_cache
-from typing import Iterable, Dict, Optional
+import random
+import threading
+import time
+from collections import Counter, deque
+from weakref import WeakKeyDictionary
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 import aiohttp
 
+from pytube.helpers import (
+    ByteBudget,
+    SingleFlight,
+    async_cache,
+    url_expiration,
+)
+from pytube.throttle import Slot, Throttle
+from pytube.tuning import Tuner
+
 logger = logging.getLogger(__name__)
 
 base_headers = {"User-Agent": "Mozilla/5.0", "accept-language": "en-US,en"}
 
+# Size of the reads of a response body decoded by :func:`get`.
+READ_SIZE = 65536  # 64KB
+
+
+# A session created by pytube, and the generator closing it.
+_OwnedSession = Tuple[aiohttp.ClientSession, AsyncGenerator[None, None]]
+
+
+class SessionManager:
+    """Owner of the :class:`aiohttp.ClientSession` shared by all requests.
+
+    Reusing one session keeps connections alive between the watch page,
+    ``get_video_info``, base.js and every range of a stream, instead of paying
+    a new TCP and TLS handshake for each of them.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        ttl_dns_cache: int = 300,
+        keepalive_timeout: float = 30,
+    ):
+        """
+        :param int limit:
+            Maximum number of simultaneous connections.
+        :param int limit_per_host:
+            Maximum number of simultaneous connections to a single host.
+        :param int ttl_dns_cache:
+            Seconds a resolved host name is cached for.
+        :param float keepalive_timeout:
+            Seconds an idle connection is kept open for reuse.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        # session injected with :meth:`set`, shared by all loops
+        self._session: Optional[aiohttp.ClientSession] = None
+        # sessions created here, one per event loop, with their closers
+        self._sessions: "WeakKeyDictionary[Any, _OwnedSession]" = (
+            WeakKeyDictionary()
+        )
+        # loops may run in different threads
+        self._lock = threading.Lock()
+
+    def get(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use.
+
+        A session is bound to the event loop it was created in, so each loop
+        gets its own (e.g.: loops running in different threads, or consecutive
+        calls of :func:`asyncio.run`). A session created here is closed when
+        its loop shuts down its asynchronous generators, which
+        :func:`asyncio.run` does before it returns. Loops run otherwise
+        should await :func:`close_session` before closing.
+
+        :rtype: :class:`aiohttp.ClientSession`
+        """
+        if self._session is not None and not self._session.closed:
+            return self._session
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._sessions.get(loop)
+            if entry is not None and not entry[0].closed:
+                return entry[0]
+            # forget the sessions of closed loops, nothing can close them now
+            for closed in [x for x in self._sessions if x.is_closed()]:
+                del self._sessions[closed]
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            # the loop closes the generator, and with it the session, when
+            # it shuts down; started right away so its ``finally`` runs.
+            closer = self._close_on_shutdown(loop, session)
+            self._sessions[loop] = (session, closer)
+        asyncio.ensure_future(closer.__anext__())
+        return session
+
+    def set(self, session: aiohttp.ClientSession) -> None:
+        """Use a session owned by the caller.
+
+        The caller is responsible for closing it, :meth:`close` leaves an
+        injected session open.
+
+        :param session:
+            The session all requests should be sent with.
+        """
+        self._session = session
+
+    async def close(self) -> None:
+        """Close the session created by pytube for the running loop.
+
+        An injected session is left open and no longer used.
+        """
+        if self._session is not None:
+            self._session = None
+            return
+        with self._lock:
+            entry = self._sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None and not entry[0].closed:
+            await entry[0].close()
+
+    async def _close_on_shutdown(
+        self, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession
+    ) -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry = self._sessions.get(loop)
+                if entry is not None and entry[0] is session:
+                    del self._sessions[loop]
+            if not session.closed:
+                await session.close()
+
+
+session_manager = SessionManager()
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Get the session shared by all requests.
+
+    :rtype: :class:`aiohttp.ClientSession`
+    """
+    return session_manager.get()
+
+
+def set_session(session: aiohttp.ClientSession) -> None:
+    """Send all requests with a session owned by the caller.
+
+    :param session:
+        An open :class:`aiohttp.ClientSession`.
+    """
+    session_manager.set(session)
+
+
+async def close_session() -> None:
+    """Close the session shared by all requests."""
+    await session_manager.close()
+
+
+class RetryPolicy:
+    """When and how long to wait before an idempotent request is sent again.
+
+    Waits grow exponentially with the number of attempts and are jittered
+    ("full jitter"), so clients failing at the same time don't retry at the
+    same time.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 8,
+        statuses: Iterable[int] = (429, 500, 502, 503, 504),
+    ):
+        """
+        :param int attempts:
+            Maximum number of times a request is sent, 1 disables retries.
+        :param float backoff:
+            Seconds waited at most before the first retry, doubled for each
+            following one.
+        :param float max_backoff:
+            Upper bound of the wait in seconds.
+        :param statuses:
+            Http status codes worth retrying.
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def delay(self, attempt: int) -> float:
+        """Get the seconds to wait after a failed attempt.
+
+        :param int attempt:
+            Number of attempts that failed so far.
+        :rtype: float
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Whether a request that failed with an error may be sent again.
+
+        :param error:
+            The exception raised by the request.
+        :rtype: bool
+        """
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in self.statuses
+        return isinstance(
+            error,
+            (
+                aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError,
+                asyncio.TimeoutError,
+            ),
+        )
+
+    def check(self, response: aiohttp.ClientResponse) -> None:
+        """Raise for a response with a status worth retrying.
+
+        :param response:
+            The response to check, released if it is raised for.
+        """
+        if response.status in self.statuses:
+            response.release()
+            response.raise_for_status()
+
+    async def call(self, func: Callable[[], Awaitable], url: str = ""):
+        """Await ``func()`` until it succeeds or the attempts are exhausted.
+
+        :param func:
+            Sends the request, called again for every attempt.
+        :param str url:
+            (Optional) The URL of the request, for logging.
+        """
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except Exception as e:  # pylint: disable=broad-except
+                if attempt >= self.attempts or not self.is_retryable(e):
+                    raise
+                delay = self.delay(attempt)
+                counters["retries"] += 1
+                logger.debug(
+                    "attempt %d of %s failed (%r), retrying in %.2fs",
+                    attempt,
+                    url,
+                    e,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies and their 95th percentile."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        :param int window:
+            Number of most recent latencies kept.
+        :param int min_samples:
+            Number of latencies needed before a percentile is given.
+        """
+        self.min_samples = min_samples
+        self.samples: Deque[float] = deque(maxlen=window)
 
-async def get(url, extra_headers=None) -> str:
+    def record(self, seconds: float) -> None:
+        """Add a latency.
+
+        :param float seconds:
+            The latency in seconds.
+        """
+        self.samples.append(seconds)
+
+    @property
+    def p95(self) -> Optional[float]:
+        """The 95th percentile in seconds, None without enough samples.
+
+        :rtype: float
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+# Shared by all requests, can be replaced to change the retry behavior.
+retry_policy = RetryPolicy()
+
+# Time to the response headers of range requests.
+range_latency = LatencyTracker()
+
+# Whether a second request is raced against a range request that takes longer
+# than the 95th percentile of ``range_latency``.
+hedge_requests = False
+
+# Number of retries ("retries"), resumed ranges ("range_resumes"), hedged
+# requests ("hedges") and hedged requests that answered first ("hedge_wins").
+counters: Counter = Counter()
+
+
+# Per host rate and concurrency limits of all requests, disabled when None,
+# e.g.: ``request.throttle = Throttle(requests_per_second=5)``.
+throttle: Optional[Throttle] = None
+
+
+def throttle_slot(url: str) -> Slot:
+    """Get the slot a request to a url has to be sent in.
+
+    Requests are sent inside the slot, and the received bytes passed to
+    :meth:`Slot.consume`. It does nothing while ``throttle`` is None.
+
+    :param str url:
+        The URL the request is sent to.
+    :rtype: :class:`Slot <pytube.throttle.Slot>`
+    """
+    if throttle is None:
+        return Slot()
+    return throttle.slot(url)
+
+
+# Whether concurrent identical GET requests share a single request by default.
+coalesce_requests = False
+_get_flight = SingleFlight()
+
+
+async def get(
+    url,
+    extra_headers=None,
+    coalesce: Optional[bool] = None,
+    until: Optional[str] = None,
+) -> str:
     """Send an http GET request.
 
     :param str url:
         The URL to perform the GET request for.
     :param str extra_headers:
         Extra headers added to the request
+    :param bool coalesce:
+        (Optional) Share the response with concurrent calls for the same url
+        and headers, instead of sending a request for each of them. Defaults
+        to ``coalesce_requests``.
+    :param str until:
+        (Optional) Stop reading the response once this substring has been
+        received, the rest of the body is never downloaded.
     :rtype: str
     :returns:
         UTF-8 encoded string of response
     """
     if extra_headers is None:
         extra_headers = {}
-    async with aiohttp.request("GET", url, headers={**base_headers,
-                                                    **extra_headers}) as res:
-        return (await res.read()).decode("utf-8")
+    headers = {**base_headers, **extra_headers}
+    if coalesce is None:
+        coalesce = coalesce_requests
+    if coalesce:
+        key = (url, tuple(sorted(headers.items())), until)
+        return await _get_flight.do(
+            key,
+            lambda: retry_policy.call(lambda: _get(url, headers, until), url),
+        )
+    return await retry_policy.call(lambda: _get(url, headers, until), url)
+
+
+async def _get(url: str, headers: Dict, until: Optional[str] = None) -> str:
+    # Decode the body while it arrives, so it's never held in memory as both
+    # bytes and text.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: List[str] = []
+    # end of the text received so far, to find ``until`` across chunks
+    tail = ""
+    async with throttle_slot(url) as slot:
+        async with get_session().get(url, headers=headers) as res:
+            slot.observe(res)
+            retry_policy.check(res)
+            async for chunk in res.content.iter_chunked(READ_SIZE):
+                await slot.consume(len(chunk))
+                text = decoder.decode(chunk)
+                parts.append(text)
+                if until is not None:
+                    window = tail + text
+                    if until in window:
+                        logger.debug("stopped reading %s early", url)
+                        break
+                    tail = window[len(window) - len(until) + 1 :]
+            else:
+                parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
 
 
 async def stream(
-        url: str, chunk_size: int = 4096, range_size: int = 9437184
+        url: str,
+        chunk_size: int = 4096,
+        range_size: int = 9437184,
+        tuner: Optional[Tuner] = None,
+        budget: Optional[ByteBudget] = None,
 ) -> Iterable[bytes]:
     """Read the response in chunks.
+
+    A range interrupted by a network error is requested again from the last
+    byte received, as allowed by ``retry_policy``.
+
     :param str url: The URL to perform the GET request for.
     :param int chunk_size: The size in bytes of each chunk. Defaults to 4KB
     :param int range_size: The size in bytes of each range request. Defaults
     to 9MB
+    :param tuner: (Optional) A :class:`Tuner <pytube.tuning.Tuner>` measuring
+    every range and choosing the chunk and range size of the next one instead
+    of ``chunk_size`` and ``range_size``, e.g.: ``Tuner()``.
+    :param budget: (Optional) A :class:`ByteBudget <pytube.helpers.ByteBudget>`
+    shared with other transfers, a chunk counts against it until the consumer
+    asks for the next one, and no more is read while it is used up.
     :rtype: Iterable[bytes]
     """
     file_size: int = range_size  # fake filesize to start
+    size_known = False
     downloaded = 0
+    failures = 0
     while downloaded < file_size:
-        stop_pos = min(downloaded + range_size, file_size) - 1
-        range_header = f"bytes={downloaded}-{stop_pos}"
-        headers = {**base_headers, "Range": range_header}
-        async with aiohttp.request(
-                method="GET", url=url, headers=headers
-        ) as res:
-            if file_size == range_size:
-                try:
-                    content_range = res.headers["Content-Range"]
-                    file_size = int(content_range.split("/")[1])
-                except (KeyError, IndexError, ValueError) as e:
-                    logger.error(e)
-            while True:
-                chunk = await res.content.read(chunk_size)
-                if not chunk:
-                    break
-                downloaded += len(chunk)
-                yield chunk
+        if tuner is not None:
+            chunk_size, range_size = tuner.chunk_size, tuner.range_size
+        stop_pos = downloaded + range_size - 1
+        if size_known:
+            stop_pos = min(stop_pos, file_size - 1)
+        range_start = downloaded
+        try:
+            async with throttle_slot(url) as slot:
+                res = await open_range(url, downloaded, stop_pos, slot)
+                async with res:
+                    if not size_known:
+                        size_known = True
+                        try:
+                            content_range = res.headers["Content-Range"]
+                            file_size = int(content_range.split("/")[1])
+                        except (KeyError, IndexError, ValueError) as e:
+                            logger.error(e)
+                            file_size = stop_pos + 1
+                    while True:
+                        chunk = await res.content.read(chunk_size)
+                        if not chunk:
+                            break
+                        await slot.consume(len(chunk))
+                        downloaded += len(chunk)
+                        failures = 0
+                        if budget is None:
+                            yield chunk
+                            continue
+                        await budget.acquire(len(chunk))
+                        try:
+                            yield chunk
+                        finally:
+                            budget.release(len(chunk))
+                if tuner is not None:
+                    tuner.record(
+                        downloaded - range_start,
+                        time.monotonic() - slot.started,
+                        slot.latency or 0,
+                    )
+        except Exception as e:  # pylint: disable=broad-except
+            failures += 1
+            if failures >= retry_policy.attempts or not (
+                retry_policy.is_retryable(e)
+            ):
+                raise
+            if tuner is not None:
+                tuner.record_failure()
+            counters["range_resumes"] += 1
+            logger.debug("resuming %s at byte %d after %r", url, downloaded, e)
+            await asyncio.sleep(retry_policy.delay(failures))
     return  # pylint: disable=R1711
 
 
-@lru_cache(maxsize=None)
+async def open_range(
+    url: str, start: int, end: Optional[int] = None, slot: Optional[Slot] = None
+) -> aiohttp.ClientResponse:
+    """Send an http GET request for a byte range.
+
+    The body is not read, the caller is responsible for releasing the
+    response, e.g.: ``async with await open_range(url, 0, 99) as res:``. The
+    request is not throttled by itself, callers send it inside
+    :func:`throttle_slot` as they read the body.
+
+    Failed requests are retried according to ``retry_policy``. With
+    ``hedge_requests`` enabled, a duplicate request is sent when no response
+    arrived within the 95th percentile of ``range_latency``, and whichever
+    answers first is used.
+
+    :param str url:
+        The URL to perform the GET request for.
+    :param int start:
+        Offset of the first byte.
+    :param int end:
+        (Optional) Offset of the last byte (inclusive), defaults to the end of
+        the file.
+    :param slot:
+        (Optional) The :func:`throttle_slot` the request is sent in, which is
+        told about every response, including those retried.
+    :rtype: :class:`aiohttp.ClientResponse`
+    """
+    range_header = f"bytes={start}-{'' if end is None else end}"
+    headers = {**base_headers, "Range": range_header}
+    if slot is None:
+        slot = Slot()
+    return await retry_policy.call(
+        lambda: _open_range(url, headers, slot), url  # type: ignore
+    )
+
+
+async def _open_range(
+    url: str, headers: Dict, slot: Slot
+) -> aiohttp.ClientResponse:
+    delay = range_latency.p95 if hedge_requests else None
+    if delay is None:
+        return await _send_range(url, headers, slot)
+
+    first = asyncio.ensure_future(_send_range(url, headers, slot))
+    done, _ = await _wait([first], delay)
+    if done:
+        return first.result()
+    counters["hedges"] += 1
+    logger.debug("hedging range request for %s after %.3fs", url, delay)
+    hedge = asyncio.ensure_future(_send_range(url, headers, slot))
+    pending = {first, hedge}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await _wait(pending)
+            winner = None
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task
+                else:
+                    task.result().release()
+            if winner is not None:
+                if winner is hedge:
+                    counters["hedge_wins"] += 1
+                return winner.result()
+        raise error  # type: ignore
+    finally:
+        for task in pending:
+            task.cancel()
+            task.add_done_callback(_release_response)
+
+
+async def _wait(tasks, timeout: Optional[float] = None):
+    try:
+        return await asyncio.wait(
+            tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+            task.add_done_callback(_release_response)
+        raise
+
+
+def _release_response(task: asyncio.Future) -> None:
+    if not task.cancelled() and task.exception() is None:
+        task.result().release()
+
+
+async def _send_range(
+    url: str, headers: Dict, slot: Slot
+) -> aiohttp.ClientResponse:
+    started = time.monotonic()
+    response = await get_session().get(url, headers=headers)
+    slot.observe(response)
+    retry_policy.check(response)
+    range_latency.record(time.monotonic() - started)
+    return response
+
+
 async def filesize(url: str) -> int:
     """Fetch size in bytes of file at given URL
 
@@ -73,15 +608,27 @@ async def filesize(url: str) -> int:
     return int((await head(url))["content-length"])
 
 
+@async_cache(maxsize=1024, expires=url_expiration)
 async def head(url: str) -> Dict:
     """Fetch headers returned http GET request.
 
+    Results are cached until the url expires, the returned dictionary is
+    shared and must not be modified.
+
     :param str url:
         The URL to perform the GET request for.
     :rtype: dict
     :returns:
         dictionary of lowercase headers
     """
-    async with aiohttp.request("HEAD", url) as res:
+    return await retry_policy.call(lambda: _head(url), url)
+
+
+async def _head(url: str) -> Dict:
+    async with throttle_slot(url) as slot, get_session().head(
+        url, allow_redirects=True
+    ) as res:
+        slot.observe(res)
+        retry_policy.check(res)
         response_headers = res.headers
         return {k.lower(): v for k, v in response_headers.items()}
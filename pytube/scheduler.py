@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements a queue of downloads with priorities.
+
+Jobs name a video url, which of its streams to download and where to. They
+are run by the highest priority first, with a global limit of jobs running at
+the same time and a per job limit of connections, and can be cancelled while
+queued or running. With a journal, the jobs are stored in a SQLite database
+and the ones still queued or running are picked up again after a restart,
+partially downloaded files continue where they stopped.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pytube.__main__ import YouTube
+from pytube.exceptions import PytubeError
+from pytube.manager import DownloadManager
+from pytube.monostate import OnComplete, OnProgress
+from pytube.query import StreamQuery
+from pytube.streams import Stream
+
+logger = logging.getLogger(__name__)
+
+# States of a :class:`Job <Job>`.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Which stream of a video to download, see :func:`select_stream`.
+Selector = Union[int, str, Dict[str, Any]]
+
+
+class Job:
+    """A download of one stream of a video."""
+
+    def __init__(
+        self,
+        job_id: int,
+        url: str,
+        selector: Selector,
+        destination: str,
+        priority: int = 0,
+        state: str = QUEUED,
+        error: Optional[str] = None,
+    ):
+        """
+        :param int job_id:
+            Identifier of the job.
+        :param str url:
+            A valid YouTube watch URL.
+        :param selector:
+            Which stream of the video to download.
+        :param str destination:
+            Where the stream is written to.
+        :param int priority:
+            Jobs with a higher priority run first.
+        :param str state:
+            One of ``queued``, ``running``, ``done``, ``failed`` or
+            ``cancelled``.
+        :param str error:
+            (Optional) Why the job failed.
+        """
+        self.id = job_id
+        self.url = url
+        self.selector = selector
+        self.destination = destination
+        self.priority = priority
+        self.state = state
+        self.error = error
+        # the stream being downloaded, once resolved
+        self.stream: Optional[Stream] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<Job: id={self.id} state={self.state} "
+            f"priority={self.priority} url={self.url}>"
+        )
+
+
+def select_stream(streams: StreamQuery, selector: Selector) -> Optional[Stream]:
+    """Pick a stream with a selector that can be stored in the journal.
+
+    :param streams:
+        The :class:`StreamQuery <StreamQuery>` of a video.
+    :param selector:
+        An itag (e.g.: ``22``), ``"highest_resolution"``,
+        ``"lowest_resolution"``, ``"audio_only"``, a resolution (e.g.:
+        ``"720p"``), or keyword arguments of :meth:`StreamQuery.filter` whose
+        first match is used (e.g.: ``{"only_audio": True}``).
+    :rtype: :class:`Stream <Stream>` or None
+    """
+    if isinstance(selector, int):
+        return streams.get_by_itag(selector)
+    if isinstance(selector, dict):
+        return streams.filter(**selector).first()
+    if selector == "highest_resolution":
+        return streams.get_highest_resolution()
+    if selector == "lowest_resolution":
+        return streams.get_lowest_resolution()
+    if selector == "audio_only":
+        return streams.get_audio_only()
+    return streams.get_by_resolution(selector)
+
+
+class Journal:
+    """SQLite database of the jobs of a :class:`Scheduler <Scheduler>`."""
+
+    def __init__(self, path: str):
+        """
+        :param str path:
+            Path of the database file, created if it does not exist.
+        """
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "url TEXT NOT NULL, "
+            "selector TEXT NOT NULL, "
+            "destination TEXT NOT NULL, "
+            "priority INTEGER NOT NULL, "
+            "state TEXT NOT NULL, "
+            "error TEXT, "
+            "updated REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def add(
+        self, url: str, selector: Selector, destination: str, priority: int
+    ) -> int:
+        """Store a new queued job.
+
+        :rtype: int
+        :returns:
+            The identifier of the job.
+        """
+        cursor = self.db.execute(
+            "INSERT INTO jobs "
+            "(url, selector, destination, priority, state, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                json.dumps(selector),
+                destination,
+                priority,
+                QUEUED,
+                time.time(),
+            ),
+        )
+        self.db.commit()
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def update(self, job: Job) -> None:
+        """Store the state of a job.
+
+        :param job:
+            The updated :class:`Job <Job>`.
+        """
+        self.db.execute(
+            "UPDATE jobs SET state = ?, error = ?, updated = ? WHERE id = ?",
+            (job.state, job.error, time.time(), job.id),
+        )
+        self.db.commit()
+
+    def unfinished(self) -> List[Job]:
+        """Load the jobs that were queued or running.
+
+        :rtype: list
+        """
+        rows = self.db.execute(
+            "SELECT id, url, selector, destination, priority FROM jobs "
+            "WHERE state IN (?, ?) ORDER BY id",
+            (QUEUED, RUNNING),
+        )
+        return [
+            Job(job_id, url, json.loads(selector), destination, priority)
+            for job_id, url, selector, destination, priority in rows
+        ]
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+
+class Scheduler:
+    """Runs download jobs by priority with limited concurrency.
+
+    **Example**:
+
+    >>> async with Scheduler("jobs.sqlite3", max_jobs=4) as scheduler:
+    ...     scheduler.add(url, "highest_resolution", "video.mp4", priority=1)
+    ...     await scheduler.join()
+
+    """
+
+    def __init__(
+        self,
+        journal_path: Optional[str] = None,
+        max_jobs: int = 4,
+        connections: int = 4,
+        on_progress_callback: Optional[OnProgress] = None,
+        on_complete_callback: Optional[OnComplete] = None,
+        manager: Optional[DownloadManager] = None,
+    ):
+        """
+        :param str journal_path:
+            (Optional) SQLite database the jobs are stored in, unfinished jobs
+            found in it are queued again.
+        :param int max_jobs:
+            Maximum number of jobs running at the same time.
+        :param int connections:
+            Number of ranges of a job downloaded at the same time.
+        :param func on_progress_callback:
+            (Optional) User defined callback function for stream download
+            progress events, :meth:`job_of` finds the job of its ``stream``.
+        :param func on_complete_callback:
+            (Optional) User defined callback function for stream download
+            complete events.
+        :param manager:
+            (Optional) The :class:`DownloadManager <DownloadManager>` whose
+            memory budget the downloads share.
+        """
+        self.max_jobs = max_jobs
+        self.connections = connections
+        self.on_progress_callback = on_progress_callback
+        self.on_complete_callback = on_complete_callback
+        self.manager = manager or DownloadManager(connections=connections)
+        self.journal = Journal(journal_path) if journal_path else None
+
+        self.jobs: Dict[int, Job] = {}
+        self._queue: List[Tuple[int, int, int]] = []  # (-priority, seq, id)
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._running: Dict[int, asyncio.Future] = {}
+        self._workers: List[asyncio.Future] = []
+        # set whenever a job is added or finishes
+        self._changed: Optional[asyncio.Event] = None
+        self._closing = False
+
+        if self.journal is not None:
+            for job in self.journal.unfinished():
+                logger.debug("restoring %s", job)
+                self._enqueue(job)
+
+    async def __aenter__(self) -> "Scheduler":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start running the queued jobs."""
+        self._closing = False
+        self._changed = asyncio.Event()
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.max_jobs)
+        ]
+
+    def add(
+        self,
+        url: str,
+        selector: Selector,
+        destination: str,
+        priority: int = 0,
+    ) -> Job:
+        """Queue a download.
+
+        :param str url:
+            A valid YouTube watch URL.
+        :param selector:
+            Which stream to download, see :func:`select_stream`.
+        :param str destination:
+            Where the stream is written to.
+        :param int priority:
+            Jobs with a higher priority run first, jobs with the same priority
+            in the order they were added.
+        :rtype: :class:`Job <Job>`
+        """
+        if self.journal is not None:
+            job_id = self.journal.add(url, selector, destination, priority)
+        else:
+            job_id = next(self._ids)
+        job = Job(job_id, url, selector, destination, priority)
+        self._enqueue(job)
+        self._notify()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job.
+
+        :param int job_id:
+            Identifier of the job.
+        :rtype: bool
+        :returns:
+            Whether the job was still queued or running.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.state not in (QUEUED, RUNNING):
+            return False
+        if job.state == QUEUED:
+            self._set_state(job, CANCELLED)
+            self._notify()
+        else:
+            job.state = CANCELLED
+            self._running[job_id].cancel()
+        return True
+
+    def job_of(self, stream: Stream) -> Optional[Job]:
+        """Get the running job downloading a stream, e.g.: in a callback.
+
+        :param stream:
+            The :class:`Stream <Stream>` passed to the callback.
+        :rtype: :class:`Job <Job>` or None
+        """
+        for job_id in self._running:
+            job = self.jobs[job_id]
+            if job.stream is stream:
+                return job
+        return None
+
+    async def join(self) -> None:
+        """Wait until no job is queued or running."""
+        if self._changed is None:
+            raise PytubeError("the scheduler has not been started")
+        while self._running or any(
+            self.jobs[job_id].state == QUEUED for _, _, job_id in self._queue
+        ):
+            self._changed.clear()
+            await self._changed.wait()
+
+    async def close(self) -> None:
+        """Stop the workers.
+
+        Running jobs are interrupted and stay unfinished in the journal, so
+        they continue when a scheduler is started with it again.
+        """
+        self._closing = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.journal is not None:
+            self.journal.close()
+
+    def _enqueue(self, job: Job) -> None:
+        self.jobs[job.id] = job
+        heapq.heappush(self._queue, (-job.priority, next(self._seq), job.id))
+
+    def _set_state(self, job: Job, state: str, error: Optional[str] = None):
+        job.state = state
+        job.error = error
+        if self.journal is not None:
+            self.journal.update(job)
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _next_job(self) -> Job:
+        while True:
+            while self._queue:
+                _, _, job_id = heapq.heappop(self._queue)
+                job = self.jobs[job_id]
+                if job.state == QUEUED:
+                    return job
+            self._changed.clear()  # type: ignore
+            await self._changed.wait()  # type: ignore
+
+    async def _worker(self) -> None:
+        while not self._closing:
+            job = await self._next_job()
+            self._set_state(job, RUNNING)
+            task = asyncio.ensure_future(self._run(job))
+            self._running[job.id] = task
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                # the scheduler is closing, the job stays unfinished
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise
+            finally:
+                del self._running[job.id]
+                if job.state == CANCELLED:
+                    logger.debug("cancelled %s", job)
+                    self._set_state(job, CANCELLED)
+                self._notify()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            yt = await YouTube.create(
+                job.url,
+                on_progress_callback=self.on_progress_callback,
+                on_complete_callback=self.on_complete_callback,
+            )
+            job.stream = select_stream(yt.streams, job.selector)
+            if job.stream is None:
+                raise PytubeError(f"no stream matches {job.selector!r}")
+            await self.manager.download(
+                job.stream,
+                job.destination,
+                connections=self.connections,
+                resume=True,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            logger.debug("%s failed: %r", job, e)
+            self._set_state(job, FAILED, repr(e))
+        else:
+            self._set_state(job, DONE)
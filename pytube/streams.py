@@ -10,71 +10,295 @@ separately).
 """
 
 from datetime import datetime
+import functools
 import logging
 import os
-from typing import Dict, Tuple, Optional, BinaryIO
+import sys
+from typing import Dict, NamedTuple, Tuple, Optional, BinaryIO
 from urllib.parse import parse_qs
 
+from pytube import downloader
 from pytube import extract
 from pytube import request
+from pytube.cipher import Cipher
+from pytube.exceptions import DownloadError
+from pytube.helpers import ByteBudget
 from pytube.itags import get_format_profile
 from pytube.monostate import Monostate
+from pytube.tuning import Tuner
 
 logger = logging.getLogger(__name__)
 
 
-class Stream:
-    """Container for stream manifest data."""
+class StreamFormat(NamedTuple):
+    """Media type and codecs of a stream, shared by streams of the same type.
+    """
+
+    mime_type: str
+    codecs: Tuple[str, ...]
+    type: str
+    subtype: str
+    video_codec: Optional[str]
+    audio_codec: Optional[str]
+
+
+@functools.lru_cache(maxsize=256)
+def stream_format(mime_type_codec: str) -> StreamFormat:
+    """Parse the ``type`` of a stream manifest, once per distinct value.
+
+    The strings are interned, so every stream of a type points to the same
+    ones.
+
+    :param str mime_type_codec:
+        String containing mime type and codecs, e.g.:
+        ``'video/webm; codecs="vp8, vorbis"'``.
+    :rtype: :class:`StreamFormat <StreamFormat>`
+    """
+    # 'video/webm; codecs="vp8, vorbis"' -> 'video/webm', ['vp8', 'vorbis']
+    mime_type, codecs = extract.mime_type_codec(mime_type_codec)
+    # 'video/webm' -> 'video', 'webm'
+    type_, subtype = mime_type.split("/")
+    codecs_ = tuple(sys.intern(codec) for codec in codecs)
+
+    # ['vp8', 'vorbis'] -> video_codec: vp8, audio_codec: vorbis. DASH
+    # streams return NoneType for audio/video depending.
+    video = audio = None
+    if len(codecs_) % 2 == 0:
+        video, audio = codecs_
+    elif type_ == "video":
+        video = codecs_[0]
+    elif type_ == "audio":
+        audio = codecs_[0]
+    return StreamFormat(
+        sys.intern(mime_type),
+        codecs_,
+        sys.intern(type_),
+        sys.intern(subtype),
+        video,
+        audio,
+    )
+
 
-    def __init__(self, stream: Dict, player_config_args: Dict, monostate: Monostate):
+class Stream:
+    """Container for stream manifest data.
+
+    Streams are kept by the thousand, so they have no instance ``__dict__``:
+    the media type and the itag profile are shared with every stream of the
+    same kind, and the player configuration lives in the monostate.
+    """
+
+    __slots__ = (
+        "_monostate",
+        "_url",
+        "_signature",
+        "_cipher",
+        "_format",
+        "_profile",
+        "_filesize",
+        "itag",
+        "is_otf",
+        "bitrate",
+    )
+
+    def __init__(
+        self,
+        stream: Dict,
+        player_config_args: Dict,
+        monostate: Monostate,
+        cipher: Optional[Cipher] = None,
+    ):
         """Construct a :class:`Stream <Stream>`.
 
         :param dict stream:
             The unscrambled data extracted from YouTube.
         :param dict player_config_args:
             The data object containing video media data like title and
-            keywords.
+            keywords, stored in the monostate unless it has one already.
         :param dict monostate:
             Dictionary of data shared across all instances of
             :class:`Stream <Stream>`.
+        :param cipher:
+            (Optional) The :class:`Cipher <Cipher>` of the player, needed if
+            the signature in the ``s`` key of ``stream`` is still ciphered.
         """
         # A dictionary shared between all instances of :class:`Stream <Stream>`
         # (Borg pattern).
         self._monostate = monostate
+        if monostate.player_config_args is None:
+            monostate.player_config_args = player_config_args
 
-        self.url = stream["url"]  # signed download url
+        self._url: str = stream["url"]  # download url, signed by ``url``
+        # ciphered signature, deciphered when the url is first read
+        self._signature: Optional[str] = stream.get("s")
+        self._cipher = cipher
         self.itag = int(stream["itag"])  # stream format id (youtube nomenclature)
 
-        # set type and codec info
-
-        # 'video/webm; codecs="vp8, vorbis"' -> 'video/webm', ['vp8', 'vorbis']
-        self.mime_type, self.codecs = extract.mime_type_codec(stream["type"])
-
-        # 'video/webm' -> 'video', 'webm'
-        self.type, self.subtype = self.mime_type.split("/")
-
-        # ['vp8', 'vorbis'] -> video_codec: vp8, audio_codec: vorbis. DASH
-        # streams return NoneType for audio/video depending.
-        self.video_codec, self.audio_codec = self.parse_codecs()
+        # type and codec info
+        self._format = stream_format(stream["type"])
 
         self.is_otf: bool = stream["is_otf"]
         self.bitrate: Optional[int] = stream["bitrate"]
 
-        self._filesize: Optional[int] = None  # filesize in bytes
+        # filesize in bytes, known upfront from the player_response
+        content_length = stream.get("content_length")
+        self._filesize: Optional[int] = (
+            int(content_length) if content_length else None
+        )
 
         # Additional information about the stream format, such as resolution,
         # frame rate, and whether the stream is live (HLS) or 3D.
-        itag_profile = get_format_profile(self.itag)
-        self.is_dash = itag_profile["is_dash"]
-        self.abr = itag_profile["abr"]  # average bitrate (audio streams only)
-        self.fps = itag_profile["fps"]  # frames per second (video streams only)
-        self.resolution = itag_profile["resolution"]  # resolution (e.g.: "480p")
-        self.is_3d = itag_profile["is_3d"]
-        self.is_hdr = itag_profile["is_hdr"]
-        self.is_live = itag_profile["is_live"]
+        self._profile = get_format_profile(self.itag, stream)
+
+    @property
+    def mime_type(self) -> str:
+        """Mime type of the stream, e.g.: ``"video/webm"``.
+
+        :rtype: str
+        """
+        return self._format.mime_type
+
+    @property
+    def codecs(self) -> Tuple[str, ...]:
+        """Codecs of the stream, e.g.: ``("vp8", "vorbis")``.
+
+        :rtype: tuple
+        """
+        return self._format.codecs
+
+    @property
+    def type(self) -> str:
+        """Type of the stream, ``"video"`` or ``"audio"``.
+
+        :rtype: str
+        """
+        return self._format.type
+
+    @property
+    def subtype(self) -> str:
+        """Subtype of the stream, e.g.: ``"webm"``.
+
+        :rtype: str
+        """
+        return self._format.subtype
+
+    @property
+    def video_codec(self) -> Optional[str]:
+        """Video codec of the stream, None for audio only streams.
+
+        :rtype: str
+        """
+        return self._format.video_codec
+
+    @property
+    def audio_codec(self) -> Optional[str]:
+        """Audio codec of the stream, None for video only streams.
+
+        :rtype: str
+        """
+        return self._format.audio_codec
+
+    @property
+    def is_dash(self) -> bool:
+        """Whether the itag is a DASH format.
+
+        :rtype: bool
+        """
+        return self._profile.is_dash
+
+    @property
+    def abr(self) -> Optional[str]:
+        """Average bitrate (audio streams only), e.g.: ``"128kbps"``.
+
+        :rtype: str
+        """
+        return self._profile.abr
+
+    @property
+    def fps(self) -> int:
+        """Frames per second (video streams only).
+
+        :rtype: int
+        """
+        return self._profile.fps
+
+    @property
+    def resolution(self) -> Optional[str]:
+        """Resolution of the video, e.g.: ``"480p"``.
+
+        :rtype: str
+        """
+        return self._profile.resolution
+
+    @property
+    def width(self) -> Optional[int]:
+        """Width of the video in pixels, if given by the player_response.
+
+        :rtype: int
+        """
+        return self._profile.width
+
+    @property
+    def height(self) -> Optional[int]:
+        """Height of the video in pixels, if given by the player_response.
+
+        :rtype: int
+        """
+        return self._profile.height
+
+    @property
+    def is_3d(self) -> bool:
+        """Whether the video is 3D.
+
+        :rtype: bool
+        """
+        return self._profile.is_3d
+
+    @property
+    def is_hdr(self) -> bool:
+        """Whether the video is HDR.
+
+        :rtype: bool
+        """
+        return self._profile.is_hdr
+
+    @property
+    def is_live(self) -> bool:
+        """Whether the stream is live (HLS).
 
-        # The player configuration, contains info like the video title.
-        self.player_config_args = player_config_args
+        :rtype: bool
+        """
+        return self._profile.is_live
+
+    @property
+    def player_config_args(self) -> Dict:
+        """The player configuration, contains info like the video title.
+
+        :rtype: dict
+        """
+        return self._monostate.player_config_args or {}
+
+    @property
+    def url(self) -> str:
+        """The signed download url.
+
+        A ciphered signature is deciphered on first access, so streams which
+        are never downloaded don't cost any deciphering.
+
+        :rtype: str
+        """
+        if self._signature is not None:
+            if self._cipher is None:
+                raise DownloadError(f"no cipher to sign itag {self.itag}")
+            signature = self._cipher.get_signature(self._signature)
+            self._url += "&sig=" + signature
+            self._signature = None
+            logger.debug("deciphered signature for itag=%s", self.itag)
+        return self._url
+
+    @url.setter
+    def url(self, url: str) -> None:
+        self._url = url
+        self._signature = None
 
     @property
     def is_adaptive(self) -> bool:
@@ -142,8 +366,8 @@ class Stream:
             Filesize (in bytes) of the stream.
         """
         if self._filesize is None:
-            self._filesize = request.filesize(self.url)
-        return await self._filesize
+            self._filesize = await request.filesize(self.url)
+        return self._filesize
 
     @property
     def title(self) -> str:
@@ -170,9 +394,116 @@ class Stream:
 
         return await self.filesize
 
+    async def download(
+        self,
+        file_path: str,
+        connections: int = 4,
+        resume: bool = False,
+        tuner: Optional[Tuner] = None,
+        use_mmap: bool = False,
+        budget: Optional[ByteBudget] = None,
+    ) -> str:
+        """Write the media stream to disk.
+
+        The stream is split into byte ranges which are downloaded over
+        several connections at the same time.
+
+        :param str file_path:
+            Where the media stream is written to.
+        :param int connections:
+            Number of ranges downloaded at the same time.
+        :param bool resume:
+            Download through ``<file_path>.part`` and a manifest of the
+            completed ranges, so an interrupted download continues where it
+            stopped when started again. An expired url is resolved again
+            before resuming.
+        :param tuner:
+            (Optional) A :class:`Tuner <pytube.tuning.Tuner>` adapting the size
+            of the ranges to the measured throughput, it can be inspected
+            afterwards to see the sizes chosen.
+        :param bool use_mmap:
+            Preallocate the file and map it into memory, every range is then
+            copied straight into its part of the file.
+        :param budget:
+            (Optional) A :class:`ByteBudget <pytube.helpers.ByteBudget>`
+            limiting the bytes held in memory across downloads, see
+            :class:`DownloadManager <pytube.manager.DownloadManager>`.
+        :rtype: str
+        :returns:
+            The path of the file.
+        """
+        on_progress = self._monostate.on_progress
+
+        def on_chunk(chunk: bytes, bytes_remaining: int) -> None:
+            if on_progress:
+                on_progress(self, chunk, bytes_remaining)
+
+        if resume:
+            if self.is_expired:
+                await self.refresh_url()
+            await downloader.download_resumable(
+                self.url,
+                file_path,
+                itag=self.itag,
+                connections=connections,
+                on_chunk=on_chunk,
+                tuner=tuner,
+                use_mmap=use_mmap,
+                budget=budget,
+            )
+        else:
+            await downloader.download(
+                self.url,
+                file_path,
+                # a known size saves waiting for the first range to learn it
+                filesize=self._filesize,
+                connections=connections,
+                on_chunk=on_chunk,
+                tuner=tuner,
+                use_mmap=use_mmap,
+                budget=budget,
+            )
+        if self._monostate.on_complete:
+            self._monostate.on_complete(self, file_path)
+        return file_path
+
+    async def refresh_url(self) -> str:
+        """Resolve a new signed url of the stream, e.g.: after it expired.
+
+        :rtype: str
+        :returns:
+            The new url.
+        """
+        # pylint: disable=import-outside-toplevel
+        from pytube.__main__ import YouTube
+
+        if not self._monostate.video_id:
+            raise DownloadError("video id unknown, cannot refresh the url")
+        yt = await YouTube.create(
+            f"https://youtube.com/watch?v={self._monostate.video_id}"
+        )
+        stream = yt.streams.get_by_itag(self.itag)
+        if stream is None:
+            raise DownloadError(f"itag {self.itag} is no longer available")
+        self.url = stream.url
+        self._filesize = stream._filesize
+        return self.url
+
+    @property
+    def is_expired(self) -> bool:
+        """Whether the signed url has expired.
+
+        :rtype: bool
+        """
+        try:
+            return self.expiration <= datetime.utcnow()
+        except (IndexError, KeyError, ValueError):
+            return False
+
     @property
     def expiration(self) -> datetime:
-        expire = parse_qs(self.url.split("?")[1])["expire"][0]
+        # the signature doesn't matter, no need to decipher it
+        expire = parse_qs(self._url.split("?")[1])["expire"][0]
         return datetime.utcfromtimestamp(int(expire))
 
     def __repr__(self) -> str:
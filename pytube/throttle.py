@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements client side rate limiting per host.
+
+YouTube throttles clients sending too many requests (HTTP 429, or degraded
+speeds) to youtube.com and the googlevideo hosts. Each host gets token buckets
+for requests and bytes per second, and an AIMD (additive increase,
+multiplicative decrease) controller for the number of concurrent requests: it
+backs off when the host answers 429/503 or gets slower, and slowly ramps back
+up while requests succeed, staying just under the throttle threshold.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Statuses telling the client to slow down.
+THROTTLE_STATUSES = frozenset((429, 503))
+
+
+class TokenBucket:
+    """Tokens refilled at a constant rate, e.g.: requests or bytes per second.
+
+    Acquiring more tokens than available goes into debt, the caller waits
+    until it is paid back. Concurrent callers therefore queue up in the order
+    they acquired.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param float rate:
+            Tokens added per second.
+        :param float capacity:
+            (Optional) Maximum number of tokens saved up for a burst, defaults
+            to one second worth of tokens.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Take tokens, waiting until they are available.
+
+        :param float amount:
+            Number of tokens needed.
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        self.tokens -= amount
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class ConcurrencyController:
+    """AIMD limit of the number of concurrent requests."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 1.0,
+    ):
+        """
+        :param int initial:
+            Number of concurrent requests allowed at first.
+        :param int minimum:
+            Lower bound of the limit.
+        :param int maximum:
+            Upper bound of the limit.
+        :param float decrease:
+            Factor the limit is multiplied with when backing off.
+        :param float latency_tolerance:
+            Backs off when a latency exceeds the baseline by this factor.
+        :param float cooldown:
+            Seconds between two decreases, so a burst of failures of requests
+            sent at the same time counts once.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.in_flight = 0
+        # lowest latency seen, slowly drifting up to follow the host
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        """Wait until another request may be sent."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # woken up at the same time, hand the slot to the next one
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(
+        self, latency: Optional[float] = None, throttled: bool = False
+    ) -> None:
+        """Give back the slot of a finished request and adjust the limit.
+
+        :param float latency:
+            (Optional) Seconds until the response arrived.
+        :param bool throttled:
+            Whether the host asked to slow down.
+        """
+        self.in_flight -= 1
+        if throttled:
+            self.throttled()
+        elif latency is not None:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * 0.01
+            if latency > self.baseline * self.latency_tolerance:
+                self._back_off(f"latency {latency:.3f}s")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def throttled(self) -> None:
+        """Back off after the host asked to slow down."""
+        self._back_off("throttled")
+
+    def _back_off(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        logger.debug("%s, concurrency limit now %d", reason, self.limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class HostThrottle:
+    """Rate limits and concurrency limit of a single host."""
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        bytes_per_second: Optional[float] = None,
+        controller: Optional[ConcurrencyController] = None,
+    ):
+        """
+        :param float requests_per_second:
+            (Optional) Maximum rate of requests.
+        :param float bytes_per_second:
+            (Optional) Maximum rate of response bytes.
+        :param controller:
+            (Optional) Limit of concurrent requests.
+        """
+        self.requests = (
+            TokenBucket(requests_per_second) if requests_per_second else None
+        )
+        self.bytes = TokenBucket(bytes_per_second) if bytes_per_second else None
+        self.controller = controller
+
+    def slot(self) -> "Slot":
+        """Get a slot to send a request in.
+
+        :rtype: :class:`Slot <Slot>`
+        """
+        return Slot(self)
+
+
+class Slot:
+    """Async context manager around a request to a throttled host.
+
+    Entering waits for the request rate and concurrency limits, leaving
+    reports the outcome to the concurrency controller.
+    """
+
+    def __init__(self, host: Optional[HostThrottle] = None):
+        """
+        :param host:
+            (Optional) The limits of the host, no-op without.
+        """
+        self.host = host
+        self.started = 0.0
+        self.latency: Optional[float] = None
+        self.status: Optional[int] = None
+
+    async def __aenter__(self) -> "Slot":
+        if self.host is not None:
+            if self.host.requests is not None:
+                await self.host.requests.acquire()
+            if self.host.controller is not None:
+                await self.host.controller.acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.host is None or self.host.controller is None:
+            return
+        if isinstance(exc, aiohttp.ClientResponseError):
+            self.status = exc.status
+        self.host.controller.release(
+            latency=self.latency if exc is None else None,
+            throttled=self.status in THROTTLE_STATUSES,
+        )
+
+    def observe(self, response: aiohttp.ClientResponse) -> None:
+        """Record the arrival of the response headers.
+
+        Called for every response received in the slot, the last one counts.
+
+        :param response:
+            The response to the request.
+        """
+        self.latency = time.monotonic() - self.started
+        self.status = response.status
+        if (
+            self.status in THROTTLE_STATUSES
+            and self.host is not None
+            and self.host.controller is not None
+        ):
+            # the request may be retried within the slot, back off right away
+            self.host.controller.throttled()
+
+    async def consume(self, size: int) -> None:
+        """Account for received bytes, waiting if the byte rate is exceeded.
+
+        :param int size:
+            Number of bytes received.
+        """
+        if self.host is not None and self.host.bytes is not None:
+            await self.host.bytes.acquire(size)
+
+
+class Throttle:
+    """Per host limits, created on first use with the same settings."""
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        bytes_per_second: Optional[float] = None,
+        adaptive: bool = True,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+    ):
+        """
+        :param float requests_per_second:
+            (Optional) Maximum rate of requests to each host.
+        :param float bytes_per_second:
+            (Optional) Maximum rate of response bytes from each host.
+        :param bool adaptive:
+            Whether the concurrent requests to each host are limited by a
+            :class:`ConcurrencyController <ConcurrencyController>`.
+        :param int initial_concurrency:
+            Concurrent requests allowed to a host at first.
+        :param int max_concurrency:
+            Upper bound of the concurrent requests to a host.
+        """
+        self.requests_per_second = requests_per_second
+        self.bytes_per_second = bytes_per_second
+        self.adaptive = adaptive
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.hosts: Dict[str, HostThrottle] = {}
+
+    def host(self, url: str) -> HostThrottle:
+        """Get the limits of the host of a url.
+
+        :param str url:
+            The URL a request is sent to.
+        :rtype: :class:`HostThrottle <HostThrottle>`
+        """
+        name = urlsplit(url).hostname or ""
+        host = self.hosts.get(name)
+        if host is None:
+            controller = None
+            if self.adaptive:
+                controller = ConcurrencyController(
+                    initial=self.initial_concurrency,
+                    maximum=self.max_concurrency,
+                )
+            host = self.hosts[name] = HostThrottle(
+                self.requests_per_second, self.bytes_per_second, controller
+            )
+        return host
+
+    def slot(self, url: str) -> Slot:
+        """Get a slot to send a request to the host of a url in.
+
+        :param str url:
+            The URL the request is sent to.
+        :rtype: :class:`Slot <Slot>`
+        """
+        return self.host(url).slot()
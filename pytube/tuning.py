@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements adaptive read and range sizes for downloads.
+
+Small reads cost a call per few kilobytes on fast links, ranges that are too
+small pay a round trip for little data, and ranges that are too large lose a
+lot of progress when a flaky connection fails. :class:`Tuner <Tuner>` measures
+the throughput and round trip time of the ranges downloaded so far and picks
+both sizes accordingly, within configured limits.
+"""
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Tuner:
+    """Chooses ``chunk_size`` and ``range_size`` from measured transfers.
+
+    The chosen values and the measurements they are based on are public
+    attributes, and :attr:`history` keeps the most recent decisions.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 65536,
+        range_size: int = 9437184,
+        min_chunk_size: int = 16384,
+        max_chunk_size: int = 1048576,
+        min_range_size: int = 1048576,
+        max_range_size: int = 67108864,
+        range_seconds: float = 2.0,
+        read_seconds: float = 0.01,
+        rtt_ratio: float = 20.0,
+        smoothing: float = 0.3,
+    ):
+        """
+        :param int chunk_size:
+            Read size used until the first measurement.
+        :param int range_size:
+            Range size used until the first measurement.
+        :param int min_chunk_size:
+            Lower bound of the read size.
+        :param int max_chunk_size:
+            Upper bound of the read size.
+        :param int min_range_size:
+            Lower bound of the range size.
+        :param int max_range_size:
+            Upper bound of the range size.
+        :param float range_seconds:
+            Targeted duration of a range, which bounds the progress lost when
+            a range fails.
+        :param float read_seconds:
+            Targeted amount of transfer time per read.
+        :param float rtt_ratio:
+            Minimum ratio of the transfer time of a range to the round trip
+            time, so waiting for the first byte stays a small overhead.
+        :param float smoothing:
+            Weight of a new measurement in the moving averages.
+        """
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.min_range_size = min_range_size
+        self.max_range_size = max_range_size
+        self.range_seconds = range_seconds
+        self.read_seconds = read_seconds
+        self.rtt_ratio = rtt_ratio
+        self.smoothing = smoothing
+
+        self.chunk_size = _clamp(chunk_size, min_chunk_size, max_chunk_size)
+        self.range_size = _clamp(range_size, min_range_size, max_range_size)
+        self._initial_range_size = self.range_size
+        # moving averages of a single connection, in bytes/s and seconds
+        self.throughput: Optional[float] = None
+        self.rtt: Optional[float] = None
+        # shrinks the ranges after failures, recovers with every success
+        self.failure_factor = 1.0
+        self.history: Deque[Dict] = deque(maxlen=100)
+
+    def record(self, size: int, seconds: float, rtt: float) -> None:
+        """Measure a completed range and choose new sizes.
+
+        :param int size:
+            Number of bytes received.
+        :param float seconds:
+            Duration from sending the request to the last byte.
+        :param float rtt:
+            Duration from sending the request to the response headers.
+        """
+        transfer = max(seconds - rtt, 1e-6)
+        self.throughput = self._average(self.throughput, size / transfer)
+        self.rtt = self._average(self.rtt, rtt)
+        self.failure_factor = min(1.0, self.failure_factor * 2)
+        self._choose("measured")
+
+    def record_failure(self) -> None:
+        """Shrink the ranges after a range failed, so less progress is lost
+        the next time."""
+        self.failure_factor = max(
+            self.min_range_size / self.max_range_size, self.failure_factor / 2
+        )
+        self._choose("failure")
+
+    def snapshot(self) -> Dict:
+        """Get the chosen sizes and the measurements behind them.
+
+        :rtype: dict
+        """
+        return {
+            "chunk_size": self.chunk_size,
+            "range_size": self.range_size,
+            "throughput": self.throughput,
+            "rtt": self.rtt,
+            "failure_factor": self.failure_factor,
+        }
+
+    def _average(self, average: Optional[float], value: float) -> float:
+        if average is None:
+            return value
+        return average + (value - average) * self.smoothing
+
+    def _choose(self, reason: str) -> None:
+        if self.throughput is not None:
+            range_size = self.throughput * max(
+                self.range_seconds, (self.rtt or 0) * self.rtt_ratio
+            )
+            self.range_size = _clamp(
+                int(range_size * self.failure_factor),
+                self.min_range_size,
+                self.max_range_size,
+            )
+            self.chunk_size = _clamp(
+                _power_of_two(self.throughput * self.read_seconds),
+                self.min_chunk_size,
+                self.max_chunk_size,
+            )
+        else:
+            self.range_size = _clamp(
+                int(self._initial_range_size * self.failure_factor),
+                self.min_range_size,
+                self.max_range_size,
+            )
+        snapshot = self.snapshot()
+        snapshot["reason"] = reason
+        self.history.append(snapshot)
+        logger.debug("tuned transfer sizes: %s", snapshot)
+
+
+def _clamp(value: int, lower: int, upper: int) -> int:
+    return max(lower, min(upper, value))
+
+
+def _power_of_two(value: float) -> int:
+    """Get the largest power of two not above ``value`` (at least 1)."""
+    return 1 << max(0, int(value).bit_length() - 1)